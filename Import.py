@@ -1,13 +1,33 @@
 # init_from_xml.py
 import xml.etree.ElementTree as ET
-import json
 import os
 import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+from classes.people import Member, Coach, GymBaseException
+from classes.gym_room import GymRoom
+from classes.group_class import GroupClass
+from classes.Membership_plan import MembershipPlan
+from classes.Payment import Payment
+from repositories.member_repository import MemberRepository
+from repositories.coach_repository import CoachRepository
+from repositories.gym_room_repository import GymRoomRepository
+from repositories.group_class_repository import GroupClassRepository
+from repositories.membership_plan_repository import MembershipPlanRepository
+from repositories.payment_repository import PaymentRepository
 
 def parse_bool(text: str) -> bool:
     return text.strip().lower() in ("true", "1", "yes")
 
-def init_data_from_xml(xml_path: str, output_dir: str = "data"):
+def parse_date(text: str) -> date | None:
+    # Пустой элемент — даты нет, как и пустое поле в записи (см. MemberRepository._to_object)
+    text = (text or "").strip()
+    return date.fromisoformat(text) if text else None
+
+def init_data_from_xml(xml_path: str, output_dir: str = "data", replace_on_errors: bool = False):
+    # Если хоть один элемент пришлось пропустить, хранилища не трогаются: иначе импорт
+    # с ошибкой молча заменил бы данные неполными. replace_on_errors=True — записать без них
 
     if not os.path.exists(xml_path):
         raise FileNotFoundError(f"XML-файл не найден: {xml_path}")
@@ -16,95 +36,135 @@ def init_data_from_xml(xml_path: str, output_dir: str = "data"):
     tree = ET.parse(xml_path)
     root = tree.getroot()
 
-
-    members = []
-    for el in root.findall(".//member"):
-
-        members.append({
-            "id": int(el.find("id").text),
-            "first_name": el.find("first_name").text,
-            "last_name": el.find("last_name").text,
-            "email": el.find("email").text,
-            "phone": el.find("phone").text,
-            "membership_start": el.find("membership_start").text,  # ← без _date
-            "membership_end": el.find("membership_end").text,  # ← без _date
-            "is_active": parse_bool(el.find("is_active").text)
-        })
-    with open(os.path.join(output_dir, "members.json"), "w", encoding="utf-8") as f:
-        json.dump(members, f, ensure_ascii=False, indent=2)
-
-
-    coaches = []
-    for el in root.findall(".//coach"):
-        coaches.append({
-            "id": int(el.find("id").text),
-            "first_name": el.find("first_name").text,
-            "last_name": el.find("last_name").text,
-            "email": el.find("email").text,
-            "phone": el.find("phone").text,
-            "specialization": el.find("specialization").text,
-            "hourly_rate": int(el.find("hourly_rate").text),
-            "is_active": parse_bool(el.find("is_active").text)
-        })
-    with open(os.path.join(output_dir, "coaches.json"), "w", encoding="utf-8") as f:
-        json.dump(coaches, f, ensure_ascii=False, indent=2)
-
-    rooms = []
-    for el in root.findall(".//gym_room"):
-        rooms.append({
-            "room_id": int(el.find("room_id").text),
-            "room_name": el.find("room_name").text,
-            "room_type": el.find("room_type").text,
-            "capacity": int(el.find("capacity").text)
-        })
-    with open(os.path.join(output_dir, "gym_rooms.json"), "w", encoding="utf-8") as f:
-        json.dump(rooms, f, ensure_ascii=False, indent=2)
-
-
-    classes = []
-    for el in root.findall(".//group_class"):
+    # Импорт заменяет содержимое каждого хранилища целиком — одной записью на сущность.
+    # Движок — настроенный (GYM_STORAGE_ENGINE), база SQLite лежит в той же папке
+    def path(name: str) -> str:
+        return os.path.join(output_dir, name)
+
+    db_path = path("gym.db")
+
+    def replace(repo, objects, extra=None) -> None:
+        # extra — поля из XML, которых нет в объекте; в записи они сохраняются как есть
+        records = [repo._to_record(obj) for obj in objects]
+        for record, fields in zip(records, extra or ()):
+            record.update(fields)
+        repo.storage.write_all(records)
+        repo.cache.invalidate(repo.storage.cache_key)
+
+    skipped = []
+
+    def build(elements, factory, label: str) -> list:
+        objects = []
+        for el in elements:
+            try:
+                objects.append(factory(el))
+            except (AttributeError, TypeError, ValueError, GymBaseException) as e:
+                print(f"Пропущен некорректный элемент <{label}>: {e}")
+                skipped.append(label)
+        return objects
+
+    def make_member(el) -> Member:
+        return Member(
+            id=int(el.find("id").text),
+            first_name=el.find("first_name").text,
+            last_name=el.find("last_name").text,
+            email=el.find("email").text,
+            phone=el.find("phone").text,
+            membership_start_date=parse_date(el.find("membership_start").text),
+            membership_end_date=parse_date(el.find("membership_end").text),
+            is_active=parse_bool(el.find("is_active").text)
+        )
+    members = build(root.findall(".//member"), make_member, "member")
+
+
+    def make_coach(el) -> Coach:
+        coach = Coach(
+            id=int(el.find("id").text),
+            first_name=el.find("first_name").text,
+            last_name=el.find("last_name").text,
+            email=el.find("email").text,
+            phone=el.find("phone").text,
+            specialization=el.find("specialization").text,
+            hourly_rate=Decimal(el.find("hourly_rate").text)
+        )
+        coach.is_active = parse_bool(el.find("is_active").text)
+        return coach
+    coaches = build(root.findall(".//coach"), make_coach, "coach")
+
+    def make_room(el) -> GymRoom:
+        return GymRoom(
+            room_id=int(el.find("room_id").text),
+            room_name=el.find("room_name").text,
+            room_type=el.find("room_type").text,
+            capacity=int(el.find("capacity").text)
+        )
+    rooms = build(root.findall(".//gym_room"), make_room, "gym_room")
+
+
+    coaches_by_id = {c.id: c for c in coaches}
+    rooms_by_id = {r.room_id: r for r in rooms}
+
+    def make_class(el) -> GroupClass:
         attendees_text = el.find("attendees").text or ""
         attendees = [int(x.strip()) for x in attendees_text.split(",")] if attendees_text else []
-
-        classes.append({
-            "class_id": int(el.find("class_id").text),
-            "class_name": el.find("class_name").text,
-            "coach_id": int(el.find("coach_id").text),
-            "room_id": int(el.find("room_id").text),
-            "schedule": el.find("schedule").text,
-            "max_capacity": int(el.find("max_capacity").text),
-            "current_attendees": int(el.find("current_attendees").text),
-            "attendees": attendees
-        })
-    with open(os.path.join(output_dir, "group_classes.json"), "w", encoding="utf-8") as f:
-        json.dump(classes, f, ensure_ascii=False, indent=2)
-
-
-    plans = []
-    for el in root.findall(".//membership_plan"):
-        plans.append({
-            "plan_id": int(el.find("plan_id").text),
-            "name": el.find("name").text,
-            "duration_days": int(el.find("duration_days").text),
-            "price": int(el.find("price").text)
-        })
-    with open(os.path.join(output_dir, "membership_plans.json"), "w", encoding="utf-8") as f:
-        json.dump(plans, f, ensure_ascii=False, indent=2)
-
-    payments = []
-    for el in root.findall(".//payment"):
-        payments.append({
-            "payment_id": int(el.find("payment_id").text),
-            "member_id": int(el.find("member_id").text),
-            "plan_id": int(el.find("plan_id").text),
-            "amount": int(el.find("amount").text),
-            "payment_date": el.find("payment_date").text,
-            "payment_method": el.find("payment_method").text
-        })
-    with open(os.path.join(output_dir, "payments.json"), "w", encoding="utf-8") as f:
-        json.dump(payments, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ Все JSON-файлы созданы в папке: {output_dir}")
+        coach_id = int(el.find("coach_id").text)
+        room_id = int(el.find("room_id").text)
+        if coach_id not in coaches_by_id or room_id not in rooms_by_id:
+            raise ValueError(f"нет тренера {coach_id} или зала {room_id} в импорте")
+
+        return GroupClass(
+            class_id=int(el.find("class_id").text),
+            class_name=el.find("class_name").text,
+            coach=coaches_by_id[coach_id],
+            room=rooms_by_id[room_id],
+            schedule=datetime.fromisoformat(el.find("schedule").text),
+            max_capacity=int(el.find("max_capacity").text),
+            current_attendees=int(el.find("current_attendees").text),
+            attendees=attendees
+        )
+    classes = build(root.findall(".//group_class"), make_class, "group_class")
+
+
+    def make_plan(el) -> MembershipPlan:
+        return MembershipPlan(
+            plan_id=int(el.find("plan_id").text),
+            name=el.find("name").text,
+            duration_days=int(el.find("duration_days").text),
+            price=int(el.find("price").text)
+        )
+    plans = build(root.findall(".//membership_plan"), make_plan, "membership_plan")
+
+    def make_payment(el) -> tuple:
+        payment = Payment(
+            payment_id=int(el.find("payment_id").text),
+            member_id=int(el.find("member_id").text),
+            plan_id=int(el.find("plan_id").text),
+            amount=int(el.find("amount").text),
+            payment_date=date.fromisoformat(el.find("payment_date").text)
+        )
+        return payment, {"payment_method": el.findtext("payment_method", "cash")}
+    payments = build(root.findall(".//payment"), make_payment, "payment")
+
+    if skipped and not replace_on_errors:
+        raise ValueError(
+            f"Импорт отменён: пропущено некорректных элементов — {len(skipped)}, данные не изменены"
+        )
+
+    replace(MemberRepository(path("members.json"), db_path=db_path), members)
+    coach_repo = CoachRepository(path("coaches.json"), db_path=db_path)
+    replace(coach_repo, coaches)
+    room_repo = GymRoomRepository(path("gym_rooms.json"), db_path=db_path)
+    replace(room_repo, rooms)
+    replace(GroupClassRepository(
+        path("group_classes.json"), db_path=db_path, coach_repo=coach_repo, room_repo=room_repo
+    ), classes)
+    replace(MembershipPlanRepository(path("membership_plans.json"), db_path=db_path), plans)
+    replace(
+        PaymentRepository(path("payments.json"), db_path=db_path),
+        [payment for payment, _ in payments], [fields for _, fields in payments],
+    )
+
+    print(f"✅ Данные импортированы в папку: {output_dir}")
 
 def test_import():
     print("Проверка импорта данных из XML...")
@@ -121,31 +181,28 @@ def test_import():
         print(f"Ошибка при импорте: {e}")
         return False
     
-    # Проверяем созданные JSON-файлы
+    # Проверяем, что данные читаются тем движком хранения, в который их записал импорт
     data_dir = "data"
-    expected_files = [
-        "members.json",
-        "coaches.json", 
-        "gym_rooms.json",
-        "group_classes.json",
-        "membership_plans.json",
-        "payments.json"
+    expected = [
+        ("members.json", MemberRepository),
+        ("coaches.json", CoachRepository),
+        ("gym_rooms.json", GymRoomRepository),
+        ("group_classes.json", GroupClassRepository),
+        ("membership_plans.json", MembershipPlanRepository),
+        ("payments.json", PaymentRepository),
     ]
-    
-    for file_name in expected_files:
-        file_path = os.path.join(data_dir, file_name)
-        if not os.path.exists(file_path):
-            print(f"Ошибка: Файл {file_name} не был создан")
-            return False
-            
-        # Проверяем, что файл содержит корректный JSON
+
+    for file_name, repo_class in expected:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            print(f"✓ {file_name}: OK ({len(data)} записей)")
+            repo = repo_class(os.path.join(data_dir, file_name), db_path=os.path.join(data_dir, "gym.db"))
+            records = repo.storage.load()
         except Exception as e:
-            print(f"Ошибка в файле {file_name}: {e}")
+            print(f"Ошибка в {file_name}: {e}")
+            return False
+        if not records:
+            print(f"Ошибка: данные {file_name} не были созданы")
             return False
+        print(f"✓ {file_name}: OK ({len(records)} записей)")
     
     print("\nВсе тесты пройдены успешно!")
     return True
@@ -1,4 +1,7 @@
-class MembershipPlan:
+from classes.tracking import ChangeTracking
+
+
+class MembershipPlan(ChangeTracking):
     def __init__(self, plan_id: int, name: str, duration_days: int, price: int):
         self.plan_id = self._validate_id(plan_id)
         self.name = self._validate_name(name)
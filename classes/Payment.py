@@ -1,5 +1,8 @@
 from datetime import date
-class Payment:
+from classes.tracking import ChangeTracking
+
+
+class Payment(ChangeTracking):
 
     def __init__(
         self,
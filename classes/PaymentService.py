@@ -1,6 +1,7 @@
 from datetime import date, timedelta
 from repositories.member_repository import MemberRepository
 from repositories.payment_repository import PaymentRepository
+from repositories.unit_of_work import UnitOfWork
 from classes.Payment import Payment
 
 
@@ -9,13 +10,25 @@ class PaymentService:
         self.member_repo = member_repo
         self.payment_repo = payment_repo
 
-    def purchase_membership(self, member_id: int, plan, payment_id: int) -> bool:
+    def _unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self.member_repo, self.payment_repo)
+
+    def recover(self) -> bool:
+        # Покупка, прерванная сбоем в прошлый раз, доводится до конца; вызывается при запуске,
+        # до первых чтений участников и платежей
+        return self._unit_of_work().recover()
+
+    def purchase_membership(self, member_id: int, plan, payment_id: int = None) -> bool:
         try:
             member = self.member_repo.get_by_id(member_id)
             if not member:
                 print(f"Участник с ID {member_id} не найден.")
                 return False
 
+            # Номер платежа — из общей последовательности, без поиска максимума по истории
+            if payment_id is None:
+                payment_id = self.payment_repo.next_id()
+
             payment = Payment(
                 payment_id=payment_id,
                 member_id=member_id,
@@ -23,12 +36,15 @@ class PaymentService:
                 amount=plan.price,
                 payment_date=date.today()
             )
-            self.payment_repo.save(payment)
-            print(f"Платёж #{payment_id} создан: {plan.price} руб.")
             member.membership_start_date = date.today()
             member.membership_end_date = date.today() + timedelta(days=plan.duration_days)
             member.is_active = True
-            self.member_repo.save(member)
+
+            # Платёж и активация абонемента записываются вместе или не записываются вовсе
+            with self._unit_of_work() as uow:
+                uow.save(self.payment_repo, payment)
+                uow.save(self.member_repo, member)
+            print(f"Платёж #{payment_id} создан: {plan.price} руб.")
             print(f"Абонемент активирован до: {member.membership_end_date}")
 
             return True
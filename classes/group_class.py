@@ -1,8 +1,90 @@
+import sys
 from datetime import datetime
+from functools import partial
+from typing import Callable, Iterable, Iterator, List
 from classes.people import Coach
 from classes.gym_room import GymRoom
+from classes.tracking import ChangeTracking
 
-class GroupClass:
+
+class AttendeeSet:
+    """Участники занятия: проверка, запись и отмена записи за O(1).
+
+    Внутри — множество ID; отсортированный список строится только для
+    вывода и сохранения и живёт до следующего изменения. На диске набор
+    хранится разностями соседних ID ([3, 5, 6] -> [3, 2, 1]): для плотных
+    номеров это короткие числа вместо длинных.
+    """
+
+    def __init__(self, member_ids: Iterable[int] = ()):
+        self._ids = set(member_ids)
+        self._sorted: List[int] | None = None
+        # Владелец набора узнаёт об изменениях на месте — см. GroupClass
+        self.on_change: Callable[[], None] | None = None
+
+    def _changed(self) -> None:
+        self._sorted = None
+        if self.on_change is not None:
+            self.on_change()
+
+    def __contains__(self, member_id) -> bool:
+        return member_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.sorted())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AttendeeSet):
+            return self._ids == other._ids
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AttendeeSet({self.sorted()})"
+
+    def __sizeof__(self) -> int:
+        # Для бюджета кэша объектов: вместе с множеством ID и отсортированной копией
+        size = object.__sizeof__(self) + sys.getsizeof(self._ids) + sum(map(sys.getsizeof, self._ids))
+        if self._sorted is not None:
+            size += sys.getsizeof(self._sorted)
+        return size
+
+    def sorted(self) -> List[int]:
+        if self._sorted is None:
+            self._sorted = sorted(self._ids)
+        return self._sorted
+
+    def add(self, member_id: int) -> bool:
+        if member_id in self._ids:
+            return False
+        self._ids.add(member_id)
+        self._changed()
+        return True
+
+    def remove(self, member_id: int) -> bool:
+        if member_id not in self._ids:
+            return False
+        self._ids.remove(member_id)
+        self._changed()
+        return True
+
+    def to_deltas(self) -> List[int]:
+        ids = self.sorted()
+        return [current - previous for previous, current in zip([0] + ids, ids)]
+
+    @classmethod
+    def from_deltas(cls, deltas: Iterable[int]) -> "AttendeeSet":
+        ids = []
+        total = 0
+        for delta in deltas:
+            total += delta
+            ids.append(total)
+        return cls(ids)
+
+
+class GroupClass(ChangeTracking):
     def __init__(
         self,
         class_id: int,
@@ -12,7 +94,7 @@ class GroupClass:
         schedule: datetime,
         max_capacity: int = 10,
         current_attendees: int = 0,
-        attendees: list = None,
+        attendees: Iterable[int] = None,
     ):
         self.class_id = self._validate_id(class_id)
         self.class_name = self._validate_name(class_name)
@@ -20,8 +102,15 @@ class GroupClass:
         self.room = room
         self.schedule = schedule
         self.max_capacity = self._validate_capacity(max_capacity)
-        self.current_attendees = current_attendees
-        self.attendees = attendees if attendees is not None else []
+        # current_attendees принимается для совместимости со старыми данными:
+        # число участников теперь всегда считается по самому набору
+        self.attendees = attendees if isinstance(attendees, AttendeeSet) else AttendeeSet(attendees or ())
+        # Запись и отмена записи меняют набор на месте, без присваивания поля
+        self.attendees.on_change = partial(self.mark_changed, "attendees")
+
+    @property
+    def current_attendees(self) -> int:
+        return len(self.attendees)
 
     @staticmethod
     def _validate_id(class_id: int) -> int:
@@ -42,12 +131,15 @@ class GroupClass:
         return cap
 
     def add_attendee(self, member_id) -> bool:
+        if member_id in self.attendees:
+            return False
         if self.current_attendees < self.max_capacity:
-            self.current_attendees += 1
-            self.attendees.append(member_id)
-            return True
+            return self.attendees.add(member_id)
         return False
 
+    def remove_attendee(self, member_id) -> bool:
+        return self.attendees.remove(member_id)
+
     def get_available_spots(self) -> int:
         return self.max_capacity - self.current_attendees
 
@@ -58,5 +150,5 @@ class GroupClass:
             f"зал: {self.room.room_name} | "
             f"{self.schedule.strftime('%d.%m.%Y %H:%M')} | "
             f"мест: {self.max_capacity-self.current_attendees}/{self.max_capacity}"
-            f"участники: {self.attendees}"
+            f"участники: {self.attendees.sorted()}"
         )
\ No newline at end of file
@@ -1,8 +1,11 @@
+from classes.tracking import ChangeTracking
+
+
 class InvalidRoomTypeError(ValueError):
     """Недопустимый тип зала."""
     pass
 
-class GymRoom:
+class GymRoom(ChangeTracking):
     VALID_TYPES = {"кардио", "силовой", "басссейн", "йога"}
 
     def __init__(self, room_id: int, room_name: str, room_type: str, capacity: int = 20):
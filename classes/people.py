@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 import re
 from datetime import date
 from decimal import Decimal
+from classes.tracking import ChangeTracking
 
 class GymBaseException(Exception):
     """Базовый класс для всех исключений в системе управления спортзалом"""
@@ -132,7 +133,7 @@ class Person(ABC):
     def __str__(self) -> str:
         return f"{self.get_full_name()} <{self.email}>"
 
-class Member(Person):
+class Member(ChangeTracking, Person):
     def __init__(self, id: int, first_name: str, last_name: str, email: str, phone: str, membership_start_date: date,
                  membership_end_date: date, is_active: bool=True):
         super().__init__(id, first_name, last_name, email, phone)
@@ -148,7 +149,7 @@ class Member(Person):
     def cancel_membership(self) -> None:
             self.is_active = False
 
-class Coach(Person):
+class Coach(ChangeTracking, Person):
     def __init__(self, id: int, first_name: str, last_name: str, email: str, phone: str, specialization: str, hourly_rate : Decimal):
         super().__init__(id, first_name, last_name, email, phone)
         self.specialization = specialization
@@ -0,0 +1,27 @@
+class ChangeTracking:
+    """Примесь: запоминает, каким полям объекта присваивали новые значения.
+
+    Поля с подчёркиванием не отслеживаются. Присваивание того же значения
+    изменением не считается. Репозиторий сбрасывает отметки после чтения и
+    сохранения (mark_clean), поэтому объект без изменений сохранять незачем.
+    """
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_"):
+            missing = object()
+            if self.__dict__.get(name, missing) != value:
+                self.mark_changed(name)
+        super().__setattr__(name, value)
+
+    def mark_changed(self, name: str) -> None:
+        # Для изменений на месте (набор участников), которые не проходят через присваивание
+        self.__dict__.setdefault("_changed", set()).add(name)
+
+    def changed_fields(self) -> set:
+        return set(self.__dict__.get("_changed", ()))
+
+    def has_changes(self) -> bool:
+        return bool(self.__dict__.get("_changed"))
+
+    def mark_clean(self) -> None:
+        self.__dict__.pop("_changed", None)
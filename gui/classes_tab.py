@@ -6,6 +6,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import QDateTime, Qt
 
 from classes.group_class import GroupClass
+from gui.table_sync import apply_row_changes, merge_changes
+from repositories.changes import DELETE, UPDATE, Change
 
 
 class ClassesTab(QWidget):
@@ -73,6 +75,7 @@ class ClassesTab(QWidget):
         form_layout = QFormLayout()
 
         self.class_id_edit = QLineEdit()
+        self.class_id_edit.setPlaceholderText("Пусто — выдать новый ID")
         self.class_name_edit = QLineEdit()
         self.class_coach_combo = QComboBox()
         self.class_room_combo = QComboBox()
@@ -169,16 +172,16 @@ class ClassesTab(QWidget):
         self.classes_table.itemClicked.connect(self.populate_form_from_table)
 
     def refresh_coaches_combo(self):
-        coaches = self.coach_repo.find_all()
+        coaches = self.coach_repo.select(["id", "first_name", "last_name", "specialization"])
         self.class_coach_combo.clear()
-        for coach in coaches:
-            self.class_coach_combo.addItem(f"{coach.get_full_name()} (ID: {coach.id})", coach.id)
+        for coach_id, first_name, last_name, specialization in coaches:
+            self.class_coach_combo.addItem(f"{first_name} {last_name} ({specialization}) (ID: {coach_id})", coach_id)
 
     def refresh_rooms_combo(self):
-        rooms = self.room_repo.find_all()
+        rooms = self.room_repo.select(["room_id", "room_name"])
         self.class_room_combo.clear()
-        for room in rooms:
-            self.class_room_combo.addItem(f"{room.room_name} (ID: {room.room_id})", room.room_id)
+        for room_id, room_name in rooms:
+            self.class_room_combo.addItem(f"{room_name} (ID: {room_id})", room_id)
 
     def refresh_classes_combo(self):
         classes = self.group_class_repo.find_all()
@@ -187,10 +190,10 @@ class ClassesTab(QWidget):
             self.enroll_class_combo.addItem(f"{class_item.class_name} (ID: {class_item.class_id})", class_item.class_id)
 
     def refresh_members_combo(self):
-        members = self.member_repo.get_all()
+        members = self.member_repo.select(["id", "first_name", "last_name"])
         self.enroll_member_combo.clear()
-        for member in members:
-            self.enroll_member_combo.addItem(f"{member.get_full_name()} (ID: {member.id})", member.id)
+        for member_id, first_name, last_name in members:
+            self.enroll_member_combo.addItem(f"{first_name} {last_name} (ID: {member_id})", member_id)
 
     def populate_form_from_table(self, item):
         row = item.row()
@@ -246,27 +249,65 @@ class ClassesTab(QWidget):
         self.classes_table.setRowCount(len(classes))
 
         for row, group_class in enumerate(classes):
-            self.classes_table.setItem(row, 0, QTableWidgetItem(str(group_class.class_id)))
-            self.classes_table.setItem(row, 1, QTableWidgetItem(group_class.class_name))
-            self.classes_table.setItem(row, 2, QTableWidgetItem(group_class.coach.get_full_name()))
-            self.classes_table.setItem(row, 3, QTableWidgetItem(group_class.room.room_name))
-
-            schedule = group_class.schedule.strftime("%d.%m.%Y %H:%M") if group_class.schedule else ""
-            self.classes_table.setItem(row, 4, QTableWidgetItem(schedule))
-            self.classes_table.setItem(row, 5, QTableWidgetItem(str(group_class.max_capacity)))
-            # Отображение ID участников
-            attendees_str = ", ".join(map(str, group_class.attendees)) if group_class.attendees else ""
-            self.classes_table.setItem(row, 6, QTableWidgetItem(attendees_str))
+            self.fill_class_row(row, group_class)
 
         self.classes_table.resizeColumnsToContents()
 
+    def fill_class_row(self, row, group_class):
+        self.classes_table.setItem(row, 0, QTableWidgetItem(str(group_class.class_id)))
+        self.classes_table.setItem(row, 1, QTableWidgetItem(group_class.class_name))
+        self.classes_table.setItem(row, 2, QTableWidgetItem(group_class.coach.get_full_name()))
+        self.classes_table.setItem(row, 3, QTableWidgetItem(group_class.room.room_name))
+
+        schedule = group_class.schedule.strftime("%d.%m.%Y %H:%M") if group_class.schedule else ""
+        self.classes_table.setItem(row, 4, QTableWidgetItem(schedule))
+        self.classes_table.setItem(row, 5, QTableWidgetItem(str(group_class.max_capacity)))
+        # Отображение ID участников
+        attendees_str = ", ".join(map(str, group_class.attendees)) if group_class.attendees else ""
+        self.classes_table.setItem(row, 6, QTableWidgetItem(attendees_str))
+
     def refresh_classes_table(self):
         self.all_classes = self.group_class_repo.find_all()
         self.display_classes(self.all_classes)
 
+    def apply_class_changes(self, changes):
+        # Изменения из ленты: перерисовываются только затронутые строки
+        self.all_classes = merge_changes(self.all_classes, changes, "class_id")
+        if self.search_box.text():
+            self.search_classes()
+        else:
+            apply_row_changes(self.classes_table, changes, self.fill_class_row)
+        self.refresh_classes_combo()
+
+    def apply_coach_changes(self, changes):
+        self.refresh_coaches_combo()
+        self.refresh_classes_of(changes, self.group_class_repo.find_by_coach)
+
+    def apply_room_changes(self, changes):
+        self.refresh_rooms_combo()
+        self.refresh_classes_of(changes, self.group_class_repo.find_by_room)
+
+    def apply_member_changes(self, changes):
+        self.refresh_members_combo()
+
+    def refresh_classes_of(self, changes, find_classes):
+        # В строке занятия — имя тренера и название зала: при их правке перерисовываем только эти строки
+        if any(change.kind == DELETE for change in changes):
+            # Занятие без тренера или зала не загружается — проще перечитать таблицу
+            self.refresh_classes_table()
+            return
+        affected = [
+            Change(UPDATE, group_class.class_id, group_class)
+            for change in changes
+            for group_class in find_classes(change.record_id)
+        ]
+        if affected:
+            self.apply_class_changes(affected)
+
     def add_class(self):
         try:
-            class_id = int(self.class_id_edit.text()) if self.class_id_edit.text() else 0
+            # Пустое поле ID — новая запись: ID выдаёт последовательность
+            class_id = int(self.class_id_edit.text()) if self.class_id_edit.text() else self.group_class_repo.next_id()
             class_name = self.class_name_edit.text()
             coach_id = self.class_coach_combo.currentData()
             room_id = self.class_room_combo.currentData()
@@ -306,7 +347,6 @@ class ClassesTab(QWidget):
             )
             self.group_class_repo.save(group_class)
             QMessageBox.information(self, "Успех", "Занятие успешно добавлено")
-            self.refresh_classes_table()
             self.clear_class_form()
 
         except ValueError as e:
@@ -338,7 +378,6 @@ class ClassesTab(QWidget):
                 success = self.group_class_repo.delete(class_id)
                 if success:
                     QMessageBox.information(self, "Успех", "Занятие успешно удалено")
-                    self.refresh_classes_table()
                     self.clear_class_form()
                 else:
                     QMessageBox.warning(self, "Ошибка", "Занятие с указанным ID не найдено")
@@ -383,7 +422,7 @@ class ClassesTab(QWidget):
                 QMessageBox.warning(self, "Ошибка", f"Участник с ID {member_id} не найден")
                 return
 
-            # Проверка, записан ли участник уже
+            # Проверка, записан ли участник уже (поиск в наборе, а не по списку)
             if member_id in group_class.attendees:
                 QMessageBox.warning(self, "Ошибка", "Участник уже записан на это занятие")
                 return
@@ -398,7 +437,6 @@ class ClassesTab(QWidget):
             if success:
                 self.group_class_repo.save(group_class)
                 QMessageBox.information(self, "Успех", "Участник успешно записан на занятие")
-                self.refresh_classes_table()
             else:
                 QMessageBox.warning(self, "Ошибка", "Не удалось записать участника на занятие")
 
@@ -7,6 +7,7 @@ from PyQt6.QtCore import Qt
 from decimal import Decimal
 
 from classes.people import Coach
+from gui.table_sync import apply_row_changes, merge_changes
 
 
 class CoachesTab(QWidget):
@@ -69,6 +70,7 @@ class CoachesTab(QWidget):
         form_layout = QFormLayout()
 
         self.coach_id_edit = QLineEdit()
+        self.coach_id_edit.setPlaceholderText("Пусто — выдать новый ID")
         self.coach_first_name_edit = QLineEdit()
         self.coach_last_name_edit = QLineEdit()
         self.coach_email_edit = QLineEdit()
@@ -181,23 +183,35 @@ class CoachesTab(QWidget):
         self.coaches_table.setRowCount(len(coaches))
 
         for row, coach in enumerate(coaches):
-            self.coaches_table.setItem(row, 0, QTableWidgetItem(str(coach.id)))
-            self.coaches_table.setItem(row, 1, QTableWidgetItem(coach.first_name))
-            self.coaches_table.setItem(row, 2, QTableWidgetItem(coach.last_name))
-            self.coaches_table.setItem(row, 3, QTableWidgetItem(coach.email))
-            self.coaches_table.setItem(row, 4, QTableWidgetItem(coach.phone))
-            self.coaches_table.setItem(row, 5, QTableWidgetItem(coach.specialization))
-            self.coaches_table.setItem(row, 6, QTableWidgetItem(str(coach.hourly_rate)))
+            self.fill_coach_row(row, coach)
 
         self.coaches_table.resizeColumnsToContents()
 
+    def fill_coach_row(self, row, coach):
+        self.coaches_table.setItem(row, 0, QTableWidgetItem(str(coach.id)))
+        self.coaches_table.setItem(row, 1, QTableWidgetItem(coach.first_name))
+        self.coaches_table.setItem(row, 2, QTableWidgetItem(coach.last_name))
+        self.coaches_table.setItem(row, 3, QTableWidgetItem(coach.email))
+        self.coaches_table.setItem(row, 4, QTableWidgetItem(coach.phone))
+        self.coaches_table.setItem(row, 5, QTableWidgetItem(coach.specialization))
+        self.coaches_table.setItem(row, 6, QTableWidgetItem(str(coach.hourly_rate)))
+
     def refresh_coaches_table(self):
         self.all_coaches = self.coach_repo.find_all()
         self.display_coaches(self.all_coaches)
 
+    def apply_coach_changes(self, changes):
+        # Изменения из ленты: перерисовываются только затронутые строки
+        self.all_coaches = merge_changes(self.all_coaches, changes, "id")
+        if self.search_box.text():
+            self.search_coaches()
+        else:
+            apply_row_changes(self.coaches_table, changes, self.fill_coach_row)
+
     def add_coach(self):
         try:
-            coach_id = int(self.coach_id_edit.text()) if self.coach_id_edit.text() else 0
+            # Пустое поле ID — новая запись: ID выдаёт последовательность
+            coach_id = int(self.coach_id_edit.text()) if self.coach_id_edit.text() else self.coach_repo.next_id()
             first_name = self.coach_first_name_edit.text()
             last_name = self.coach_last_name_edit.text()
             email = self.coach_email_edit.text()
@@ -222,7 +236,6 @@ class CoachesTab(QWidget):
 
             self.coach_repo.save(coach)
             QMessageBox.information(self, "Успех", "Тренер успешно добавлен")
-            self.refresh_coaches_table()
             self.clear_coach_form()
 
         except ValueError as e:
@@ -254,7 +267,6 @@ class CoachesTab(QWidget):
                 success = self.coach_repo.delete(coach_id)
                 if success:
                     QMessageBox.information(self, "Успех", "Тренер успешно удален")
-                    self.refresh_coaches_table()
                     self.clear_coach_form()
                 else:
                     QMessageBox.warning(self, "Ошибка", "Тренер с указанным ID не найден")
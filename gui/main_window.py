@@ -5,7 +5,7 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QTabWidget,
     QStatusBar, QToolBar, QMessageBox, QFileDialog
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction, QPalette, QColor
 
 from gui.members_tab import MembersTab
@@ -21,9 +21,14 @@ from repositories.gym_room_repository import GymRoomRepository
 from repositories.group_class_repository import GroupClassRepository
 from repositories.membership_plan_repository import MembershipPlanRepository
 from repositories.payment_repository import PaymentRepository
+from repositories.changes import ChangeFeed
+from classes.PaymentService import PaymentService
 
 
 class GymManagementSystem(QMainWindow):
+    # Как часто проверять, не изменили ли данные на другом рабочем месте
+    CHANGES_POLL_MS = 1000
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Система управления фитнес-клубом")
@@ -34,9 +39,10 @@ class GymManagementSystem(QMainWindow):
         self.member_repo = MemberRepository()
         self.coach_repo = CoachRepository()
         self.room_repo = GymRoomRepository()
-        self.group_class_repo = GroupClassRepository()
+        self.group_class_repo = GroupClassRepository(coach_repo=self.coach_repo, room_repo=self.room_repo)
         self.plan_repo = MembershipPlanRepository()
         self.payment_repo = PaymentRepository()
+        PaymentService(self.member_repo, self.payment_repo).recover()
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
@@ -45,6 +51,7 @@ class GymManagementSystem(QMainWindow):
         main_layout.addWidget(self.tabs)
         self.create_status_bar()
         self.create_tabs()
+        self.subscribe_to_changes()
 
     def apply_stylesheet(self):
         palette = QPalette()
@@ -221,6 +228,31 @@ class GymManagementSystem(QMainWindow):
 
         self.refresh_all_tables()
 
+    def subscribe_to_changes(self):
+        # Вкладки получают только изменившиеся записи — и свои сохранения, и чужие
+        self.changes = ChangeFeed()
+        self.changes.subscribe(self.member_repo, self.members_tab.apply_member_changes)
+        self.changes.subscribe(self.member_repo, self.classes_tab.apply_member_changes)
+        self.changes.subscribe(self.member_repo, self.reports_tab.apply_member_changes)
+        self.changes.subscribe(self.plan_repo, self.plans_tab.apply_plan_changes)
+        self.changes.subscribe(self.plan_repo, self.members_tab.apply_plan_changes)
+        self.changes.subscribe(self.plan_repo, self.reports_tab.apply_plan_changes)
+        self.changes.subscribe(self.coach_repo, self.coaches_tab.apply_coach_changes)
+        self.changes.subscribe(self.coach_repo, self.classes_tab.apply_coach_changes)
+        self.changes.subscribe(self.room_repo, self.rooms_tab.apply_room_changes)
+        self.changes.subscribe(self.room_repo, self.classes_tab.apply_room_changes)
+        self.changes.subscribe(self.group_class_repo, self.classes_tab.apply_class_changes)
+        self.changes.subscribe(self.payment_repo, self.reports_tab.apply_payment_changes)
+
+        self.changes_timer = QTimer(self)
+        self.changes_timer.timeout.connect(self.changes.poll)
+        self.changes_timer.start(self.CHANGES_POLL_MS)
+
+    def closeEvent(self, event):
+        self.changes_timer.stop()
+        self.changes.close()
+        super().closeEvent(event)
+
     def refresh_all_tables(self):
         self.members_tab.refresh_members_table()
         self.classes_tab.refresh_classes_table()
@@ -9,6 +9,7 @@ from decimal import Decimal
 
 from classes.people import Member
 from classes.PaymentService import PaymentService
+from gui.table_sync import apply_row_changes, merge_changes
 
 
 class MembersTab(QWidget):
@@ -72,6 +73,7 @@ class MembersTab(QWidget):
         form_layout = QFormLayout()
 
         self.member_id_edit = QLineEdit()
+        self.member_id_edit.setPlaceholderText("Пусто — выдать новый ID")
         self.member_first_name_edit = QLineEdit()
         self.member_last_name_edit = QLineEdit()
         self.member_email_edit = QLineEdit()
@@ -222,36 +224,52 @@ class MembersTab(QWidget):
         self.members_table.setRowCount(len(members))
 
         for row, member in enumerate(members):
-            self.members_table.setItem(row, 0, QTableWidgetItem(str(member.id)))
-            self.members_table.setItem(row, 1, QTableWidgetItem(member.first_name))
-            self.members_table.setItem(row, 2, QTableWidgetItem(member.last_name))
-            self.members_table.setItem(row, 3, QTableWidgetItem(member.email))
-            self.members_table.setItem(row, 4, QTableWidgetItem(member.phone))
+            self.fill_member_row(row, member)
 
-            start_date = member.membership_start_date.strftime("%d.%m.%Y") if member.membership_start_date else ""
-            self.members_table.setItem(row, 5, QTableWidgetItem(start_date))
+        self.members_table.resizeColumnsToContents()
 
-            end_date = member.membership_end_date.strftime("%d.%m.%Y") if member.membership_end_date else ""
-            self.members_table.setItem(row, 6, QTableWidgetItem(end_date))
+    def fill_member_row(self, row, member):
+        self.members_table.setItem(row, 0, QTableWidgetItem(str(member.id)))
+        self.members_table.setItem(row, 1, QTableWidgetItem(member.first_name))
+        self.members_table.setItem(row, 2, QTableWidgetItem(member.last_name))
+        self.members_table.setItem(row, 3, QTableWidgetItem(member.email))
+        self.members_table.setItem(row, 4, QTableWidgetItem(member.phone))
 
-            active_status = "Да" if member.is_active else "Нет"
-            self.members_table.setItem(row, 7, QTableWidgetItem(active_status))
+        start_date = member.membership_start_date.strftime("%d.%m.%Y") if member.membership_start_date else ""
+        self.members_table.setItem(row, 5, QTableWidgetItem(start_date))
 
-        self.members_table.resizeColumnsToContents()
+        end_date = member.membership_end_date.strftime("%d.%m.%Y") if member.membership_end_date else ""
+        self.members_table.setItem(row, 6, QTableWidgetItem(end_date))
+
+        active_status = "Да" if member.is_active else "Нет"
+        self.members_table.setItem(row, 7, QTableWidgetItem(active_status))
 
     def refresh_members_table(self):
-        self.all_members = self.member_repo.get_all()
+        # Таблице и поиску хватает полей записи — полные объекты не создаём
+        self.all_members = self.member_repo.get_all(lazy=True)
         self.display_members(self.all_members)
 
+    def apply_member_changes(self, changes):
+        # Изменения из ленты: перерисовываются только затронутые строки
+        self.all_members = merge_changes(self.all_members, changes, "id")
+        if self.search_box.text():
+            self.search_members()
+        else:
+            apply_row_changes(self.members_table, changes, self.fill_member_row)
+
+    def apply_plan_changes(self, changes):
+        self.refresh_plans_combo()
+
     def refresh_plans_combo(self):
-        plans = self.plan_repo.find_all()
+        plans = self.plan_repo.select(["plan_id", "name", "price"])
         self.purchase_plan_combo.clear()
-        for plan in plans:
-            self.purchase_plan_combo.addItem(f"{plan.name} ({plan.price} руб.)", plan.plan_id)
+        for plan_id, name, price in plans:
+            self.purchase_plan_combo.addItem(f"{name} ({price} руб.)", plan_id)
 
     def add_member(self):
         try:
-            member_id = int(self.member_id_edit.text()) if self.member_id_edit.text() else 0
+            # Пустое поле ID — новая запись: ID выдаёт последовательность
+            member_id = int(self.member_id_edit.text()) if self.member_id_edit.text() else self.member_repo.next_id()
             first_name = self.member_first_name_edit.text()
             last_name = self.member_last_name_edit.text()
             email = self.member_email_edit.text()
@@ -277,7 +295,6 @@ class MembersTab(QWidget):
 
             self.member_repo.save(member)
             QMessageBox.information(self, "Успех", "Участник успешно добавлен")
-            self.refresh_members_table()
             self.clear_member_form()
 
         except Exception as e:
@@ -286,7 +303,17 @@ class MembersTab(QWidget):
     def update_member(self):
         self.add_member()
 
+    def selected_member_ids(self):
+        rows = sorted({index.row() for index in self.members_table.selectedIndexes()})
+        return [int(self.members_table.item(row, 0).text()) for row in rows]
+
     def delete_member(self):
+        # Если в таблице выделено несколько строк — удаляем их одним пакетом
+        selected_ids = self.selected_member_ids()
+        if len(selected_ids) > 1:
+            self.delete_selected_members(selected_ids)
+            return
+
         try:
             member_id_text = self.member_id_edit.text()
             if not member_id_text:
@@ -307,7 +334,6 @@ class MembersTab(QWidget):
                 success = self.member_repo.delete(member_id)
                 if success:
                     QMessageBox.information(self, "Успех", "Участник успешно удален")
-                    self.refresh_members_table()
                     self.clear_member_form()
                 else:
                     QMessageBox.warning(self, "Ошибка", "Участник с указанным ID не найден")
@@ -317,6 +343,23 @@ class MembersTab(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось удалить участника: {str(e)}")
 
+    def delete_selected_members(self, member_ids):
+        try:
+            reply = QMessageBox.question(
+                self, "Подтверждение",
+                f"Вы уверены, что хотите удалить выбранных участников ({len(member_ids)})?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+
+            if reply == QMessageBox.StandardButton.Yes:
+                outcomes = self.member_repo.delete_many(member_ids)
+                deleted = sum(1 for found in outcomes.values() if found)
+                QMessageBox.information(self, "Успех", f"Удалено участников: {deleted} из {len(member_ids)}")
+                self.clear_member_form()
+
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось удалить участников: {str(e)}")
+
     def clear_member_form(self):
         self.member_id_edit.clear()
         self.member_first_name_edit.clear()
@@ -358,17 +401,11 @@ class MembersTab(QWidget):
             # Создание сервиса оплаты и обработка покупки
             payment_service = PaymentService(self.member_repo, self.payment_repo)
 
-            # Генерация нового ID платежа
-            payments = self.payment_repo.find_all()
-            payment_id = max([p.payment_id for p in payments], default=0) + 1
-
-            # Обработка покупки
-            success = payment_service.purchase_membership(member_id, plan, payment_id)
+            # Обработка покупки; ID платежа выдаёт последовательность репозитория
+            success = payment_service.purchase_membership(member_id, plan)
 
             if success:
                 QMessageBox.information(self, "Успех", "Абонемент успешно куплен и активирован")
-                self.refresh_members_table()
-                self.refresh_plans_combo()
                 self.purchase_member_id_edit.clear()
             else:
                 QMessageBox.critical(self, "Ошибка", "Не удалось купить абонемент")
@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 
 from classes.Membership_plan import MembershipPlan
+from gui.table_sync import apply_row_changes, merge_changes
 
 
 class PlansTab(QWidget):
@@ -66,6 +67,7 @@ class PlansTab(QWidget):
         form_layout = QFormLayout()
 
         self.plan_id_edit = QLineEdit()
+        self.plan_id_edit.setPlaceholderText("Пусто — выдать новый ID")
         self.plan_name_edit = QLineEdit()
         self.plan_duration_edit = QLineEdit()
         self.plan_price_edit = QLineEdit()
@@ -165,20 +167,32 @@ class PlansTab(QWidget):
         self.plans_table.setRowCount(len(plans))
 
         for row, plan in enumerate(plans):
-            self.plans_table.setItem(row, 0, QTableWidgetItem(str(plan.plan_id)))
-            self.plans_table.setItem(row, 1, QTableWidgetItem(plan.name))
-            self.plans_table.setItem(row, 2, QTableWidgetItem(str(plan.duration_days)))
-            self.plans_table.setItem(row, 3, QTableWidgetItem(str(plan.price)))
+            self.fill_plan_row(row, plan)
 
         self.plans_table.resizeColumnsToContents()
 
+    def fill_plan_row(self, row, plan):
+        self.plans_table.setItem(row, 0, QTableWidgetItem(str(plan.plan_id)))
+        self.plans_table.setItem(row, 1, QTableWidgetItem(plan.name))
+        self.plans_table.setItem(row, 2, QTableWidgetItem(str(plan.duration_days)))
+        self.plans_table.setItem(row, 3, QTableWidgetItem(str(plan.price)))
+
     def refresh_plans_table(self):
         self.all_plans = self.plan_repo.find_all()
         self.display_plans(self.all_plans)
 
+    def apply_plan_changes(self, changes):
+        # Изменения из ленты: перерисовываются только затронутые строки
+        self.all_plans = merge_changes(self.all_plans, changes, "plan_id")
+        if self.search_box.text():
+            self.search_plans()
+        else:
+            apply_row_changes(self.plans_table, changes, self.fill_plan_row)
+
     def add_plan(self):
         try:
-            plan_id = int(self.plan_id_edit.text()) if self.plan_id_edit.text() else 0
+            # Пустое поле ID — новая запись: ID выдаёт последовательность
+            plan_id = int(self.plan_id_edit.text()) if self.plan_id_edit.text() else self.plan_repo.next_id()
             name = self.plan_name_edit.text()
             duration_days = int(self.plan_duration_edit.text()) if self.plan_duration_edit.text() else 0
             price = int(self.plan_price_edit.text()) if self.plan_price_edit.text() else 0
@@ -196,7 +210,6 @@ class PlansTab(QWidget):
 
             self.plan_repo.save(plan)
             QMessageBox.information(self, "Успех", "Абонемент успешно добавлен")
-            self.refresh_plans_table()
             self.clear_plan_form()
 
         except ValueError:
@@ -229,7 +242,6 @@ class PlansTab(QWidget):
                 success = self.plan_repo.delete(plan_id)
                 if success:
                     QMessageBox.information(self, "Успех", "Абонемент успешно удален")
-                    self.refresh_plans_table()
                     self.clear_plan_form()
                 else:
                     QMessageBox.warning(self, "Ошибка", "Абонемент с указанным ID не найден")
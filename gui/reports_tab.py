@@ -7,6 +7,9 @@ from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 from decimal import Decimal
 
+from gui.table_sync import apply_row_changes
+from repositories.changes import UPDATE, Change
+
 
 class ReportsTab(QWidget):
     def __init__(self, payment_repo, member_repo, plan_repo):
@@ -107,28 +110,40 @@ class ReportsTab(QWidget):
         self.plot_members_chart()
 
     def refresh_payments_table(self):
-        payments = self.payment_repo.find_all()
+        payments = self.payment_repo.find_all(lazy=True)
+        all_members = self.member_repo.get_all(lazy=True)
+        members = {}
+        for member in all_members:
+            members.setdefault(member.id, member)  # при дублях ID — первый, как в get_by_id
         self.payments_table.setRowCount(len(payments))
 
-        total_revenue = Decimal("0.00")
         for row, payment in enumerate(payments):
-            self.payments_table.setItem(row, 0, QTableWidgetItem(str(payment.payment_id)))
+            self.fill_payment_row(row, payment, members.get(payment.member_id))
+
+        self.refresh_stats(all_members)
+
+    def fill_payment_row(self, row, payment, member):
+        self.payments_table.setItem(row, 0, QTableWidgetItem(str(payment.payment_id)))
 
-            member = self.member_repo.get_by_id(payment.member_id)
-            member_name = member.get_full_name() if member else "Не найден"
-            self.payments_table.setItem(row, 1, QTableWidgetItem(member_name))
+        member_name = member.get_full_name() if member else "Не найден"
+        self.payments_table.setItem(row, 1, QTableWidgetItem(member_name))
 
-            plan = self.plan_repo.find_by_id(payment.plan_id)
-            plan_name = plan.name if plan else "Не найден"
-            self.payments_table.setItem(row, 2, QTableWidgetItem(plan_name))
+        plan = self.plan_repo.find_by_id(payment.plan_id)
+        plan_name = plan.name if plan else "Не найден"
+        self.payments_table.setItem(row, 2, QTableWidgetItem(plan_name))
 
-            amount = float(payment.amount) if isinstance(payment.amount, Decimal) else payment.amount
-            amount_str = f"{amount:.2f}"
-            self.payments_table.setItem(row, 3, QTableWidgetItem(amount_str))
-            total_revenue += Decimal(str(payment.amount))
+        amount = float(payment.amount) if isinstance(payment.amount, Decimal) else payment.amount
+        amount_str = f"{amount:.2f}"
+        self.payments_table.setItem(row, 3, QTableWidgetItem(amount_str))
+
+    def refresh_stats(self, all_members=None):
+        if all_members is None:
+            all_members = self.member_repo.get_all(lazy=True)
+        # Представления платежей кэшируются вместе с индексом — таблицу заново не строим
+        payments = self.payment_repo.find_all(lazy=True)
+        total_revenue = sum((Decimal(str(p.amount)) for p in payments), Decimal("0.00"))
 
         # Обновление статистики
-        all_members = self.member_repo.get_all()
         total_members = len(all_members)
         active_members = sum(1 for m in all_members if m.is_active)
 
@@ -138,17 +153,42 @@ class ReportsTab(QWidget):
             f"Активных участников: {active_members}"
         )
 
+    def apply_payment_changes(self, changes):
+        # Изменения из ленты: перерисовываются только затронутые строки
+        apply_row_changes(self.payments_table, changes, self.fill_changed_payment_row)
+        self.refresh_stats()
+
+    def fill_changed_payment_row(self, row, payment):
+        self.fill_payment_row(row, payment, self.member_repo.get_by_id(payment.member_id))
+
+    def apply_member_changes(self, changes):
+        # Имя участника есть в строках его платежей — обновляем только их
+        self.refresh_payments_of(changes, self.payment_repo.find_by_member_id)
+        self.refresh_stats()
+
+    def apply_plan_changes(self, changes):
+        self.refresh_payments_of(changes, self.payment_repo.find_by_plan_id)
+
+    def refresh_payments_of(self, changes, find_payments):
+        affected = [
+            Change(UPDATE, payment.payment_id, payment)
+            for change in changes
+            for payment in find_payments(change.record_id)
+        ]
+        if affected:
+            apply_row_changes(self.payments_table, affected, self.fill_changed_payment_row)
+
     def plot_revenue_chart(self):
         self.revenue_figure.clear()
         ax = self.revenue_figure.add_subplot(111)
 
-        payments = self.payment_repo.find_all()
         plan_revenue = {}
 
-        for payment in payments:
-            plan = self.plan_repo.find_by_id(payment.plan_id)
+        # Суммы по планам берутся из индекса платежей по plan_id
+        for plan_id, revenue in self.payment_repo.revenue_by_plan().items():
+            plan = self.plan_repo.find_by_id(plan_id)
             plan_name = plan.name if plan else "Неизвестный план"
-            plan_revenue[plan_name] = plan_revenue.get(plan_name, Decimal("0")) + payment.amount
+            plan_revenue[plan_name] = plan_revenue.get(plan_name, Decimal("0")) + revenue
 
         if not plan_revenue:
             ax.text(0.5, 0.5, "Нет данных", ha='center', va='center', transform=ax.transAxes)
@@ -178,7 +218,7 @@ class ReportsTab(QWidget):
         self.members_figure.clear()
         ax = self.members_figure.add_subplot(111)
 
-        members = self.member_repo.get_all()
+        members = self.member_repo.get_all(lazy=True)
         active = sum(1 for m in members if m.is_active)
         inactive = len(members) - active
 
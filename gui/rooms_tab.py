@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 
 from classes.gym_room import GymRoom
+from gui.table_sync import apply_row_changes, merge_changes
 
 
 class RoomsTab(QWidget):
@@ -67,6 +68,7 @@ class RoomsTab(QWidget):
         form_layout = QFormLayout()
 
         self.room_id_edit = QLineEdit()
+        self.room_id_edit.setPlaceholderText("Пусто — выдать новый ID")
         self.room_name_edit = QLineEdit()
         self.room_type_edit = QLineEdit()
         self.room_capacity_edit = QLineEdit()
@@ -167,20 +169,32 @@ class RoomsTab(QWidget):
         self.rooms_table.setRowCount(len(rooms))
 
         for row, room in enumerate(rooms):
-            self.rooms_table.setItem(row, 0, QTableWidgetItem(str(room.room_id)))
-            self.rooms_table.setItem(row, 1, QTableWidgetItem(room.room_name))
-            self.rooms_table.setItem(row, 2, QTableWidgetItem(room.room_type))
-            self.rooms_table.setItem(row, 3, QTableWidgetItem(str(room.capacity)))
+            self.fill_room_row(row, room)
 
         self.rooms_table.resizeColumnsToContents()
 
+    def fill_room_row(self, row, room):
+        self.rooms_table.setItem(row, 0, QTableWidgetItem(str(room.room_id)))
+        self.rooms_table.setItem(row, 1, QTableWidgetItem(room.room_name))
+        self.rooms_table.setItem(row, 2, QTableWidgetItem(room.room_type))
+        self.rooms_table.setItem(row, 3, QTableWidgetItem(str(room.capacity)))
+
     def refresh_rooms_table(self):
         self.all_rooms = self.room_repo.find_all()
         self.display_rooms(self.all_rooms)
 
+    def apply_room_changes(self, changes):
+        # Изменения из ленты: перерисовываются только затронутые строки
+        self.all_rooms = merge_changes(self.all_rooms, changes, "room_id")
+        if self.search_box.text():
+            self.search_rooms()
+        else:
+            apply_row_changes(self.rooms_table, changes, self.fill_room_row)
+
     def add_room(self):
         try:
-            room_id = int(self.room_id_edit.text()) if self.room_id_edit.text() else 0
+            # Пустое поле ID — новая запись: ID выдаёт последовательность
+            room_id = int(self.room_id_edit.text()) if self.room_id_edit.text() else self.room_repo.next_id()
             room_name = self.room_name_edit.text()
             room_type = self.room_type_edit.text()
             capacity = int(self.room_capacity_edit.text()) if self.room_capacity_edit.text() else 0
@@ -198,7 +212,6 @@ class RoomsTab(QWidget):
 
             self.room_repo.save(room)
             QMessageBox.information(self, "Успех", "Зал успешно добавлен")
-            self.refresh_rooms_table()
             self.clear_room_form()
 
         except ValueError:
@@ -231,7 +244,6 @@ class RoomsTab(QWidget):
                 success = self.room_repo.delete(room_id)
                 if success:
                     QMessageBox.information(self, "Успех", "Зал успешно удален")
-                    self.refresh_rooms_table()
                     self.clear_room_form()
                 else:
                     QMessageBox.warning(self, "Ошибка", "Зал с указанным ID не найден")
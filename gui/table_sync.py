@@ -0,0 +1,60 @@
+# gui/table_sync.py
+from repositories.changes import DELETE, INSERT
+
+
+def merge_changes(items, changes, key):
+    """Применяет изменения из ленты к списку объектов вкладки.
+
+    Изменённые объекты заменяются на месте, удалённые убираются,
+    новые добавляются в конец — список не перечитывается целиком.
+    """
+    by_id = {change.record_id: change for change in changes}
+    merged = []
+    present = set()
+    for item in items:
+        record_id = getattr(item, key)
+        change = by_id.get(record_id)
+        if change is None:
+            merged.append(item)
+        elif change.kind != DELETE:
+            merged.append(change.obj)
+        present.add(record_id)
+    for change in changes:
+        if change.kind == INSERT and change.record_id not in present:
+            merged.append(change.obj)
+    return merged
+
+
+def apply_row_changes(table, changes, fill_row, key_column=0):
+    """Переносит изменения в строки таблицы, находя строку по ID в колонке key_column.
+
+    fill_row(row, obj) заполняет одну строку — тем же методом вкладка
+    рисует и всю таблицу.
+    """
+    # При включённой сортировке строка уезжает сразу после setItem — отключаем на время правки
+    sorting = table.isSortingEnabled()
+    table.setSortingEnabled(False)
+    rows = {}
+    for row in range(table.rowCount()):
+        item = table.item(row, key_column)
+        if item is not None:
+            rows.setdefault(item.text(), []).append(row)
+
+    removed = []
+    for change in changes:
+        found = rows.get(str(change.record_id), [])
+        if change.kind == DELETE:
+            removed.extend(found)
+        elif found:
+            for row in found:
+                fill_row(row, change.obj)
+        else:
+            row = table.rowCount()
+            table.insertRow(row)
+            fill_row(row, change.obj)
+            rows[str(change.record_id)] = [row]
+    # Новые строки добавлены в конец, поэтому номера удаляемых не сдвинулись
+    for row in sorted(set(removed), reverse=True):
+        table.removeRow(row)
+    table.setSortingEnabled(sorting)
+    table.resizeColumnsToContents()
@@ -18,8 +18,10 @@ from repositories.payment_repository import PaymentRepository
 def ensure_data_exists():
     plan_repo = MembershipPlanRepository()
     if not plan_repo.find_all():
-        plan_repo.save(MembershipPlan(1, "Базовый (10 мес)", 300, 34800))
-        plan_repo.save(MembershipPlan(2, "Премиум (14 мес)", 420, 41200))
+        plan_repo.save_many([
+            MembershipPlan(1, "Базовый (10 мес)", 300, 34800),
+            MembershipPlan(2, "Премиум (14 мес)", 420, 41200),
+        ])
         print("Созданы базовые абонементы")
 
     coach_repo = CoachRepository()
@@ -38,14 +40,17 @@ def ensure_data_exists():
 
 print("Добро пожаловать в систему управления фитнес-клубом!\n")
 
-ensure_data_exists()
-
 member_repo = MemberRepository()
 plan_repo = MembershipPlanRepository()
 payment_repo = PaymentRepository()
-group_repo = GroupClassRepository()
+payment_service = PaymentService(member_repo, payment_repo)
+payment_service.recover()
+
+ensure_data_exists()
+
 coach_repo = CoachRepository()
 room_repo = GymRoomRepository()
+group_repo = GroupClassRepository(coach_repo=coach_repo, room_repo=room_repo)
 
 
 print("Существующие участники:")
@@ -77,7 +82,6 @@ plans = plan_repo.find_all()
 chosen_plan = plans[0]
 print(f"Выбран план: {chosen_plan}")
 
-payment_service = PaymentService(member_repo, payment_repo)
 success = payment_service.purchase_membership(
     member_id=new_member.id,
     plan=chosen_plan,
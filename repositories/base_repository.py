@@ -0,0 +1,242 @@
+# repositories/base_repository.py
+import copy
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from repositories.cache import RecordIndex, RepositoryCache, shared_cache
+from repositories.json_codec import JsonCodec
+from repositories.locking import check_conflict, is_clean, is_stored, remember
+from repositories.sequences import IdSequence
+from repositories.storage import DEFAULT_DB_PATH, make_storage, save_record
+
+T = TypeVar("T")
+
+
+class BaseRepository(Generic[T]):
+    """Общая часть всех репозиториев: хранилище, кэш, сохранение, выборки, ID.
+
+    Где лежат записи (JSON-файл, журнал, снимок, SQLite, память), решает
+    движок из make_storage — одинаково для всех сущностей. Подкласс задаёт
+    только описание хранилища в атрибутах класса и отображение записи в
+    объект и обратно: _to_record и _to_object.
+    """
+
+    TABLE: str = ""  # таблица SQLite
+    KEY: str = "id"  # первичный ключ записи
+    COLUMNS: Sequence[str] = ()  # поля записи, по которым SQLite строит индексы
+    # Поля записи для бинарного снимка — в том же порядке, что в _to_record
+    BINARY_SCHEMA: Sequence[Tuple[str, str]] = ()
+    VIEW: Optional[type] = None  # представление для find_all(lazy=True)
+    # Формат JSON файлов сущности: имя из json_codec.CODECS или JsonCodec; None — GYM_JSON_CODEC
+    CODEC: Union[str, JsonCodec, None] = None
+
+    def __init__(self, filename: str, cache: RepositoryCache = shared_cache, engine: str = None,
+                 db_path: str = DEFAULT_DB_PATH, codec: Union[str, JsonCodec] = None, **storage_options):
+        self.filename = filename
+        self.cache = cache
+        self.storage = make_storage(
+            filename, self.TABLE, self.KEY, columns=self.COLUMNS, engine=engine, db_path=db_path,
+            schema=self.BINARY_SCHEMA, codec=codec or self.CODEC, **storage_options,
+        )
+        self.ids = IdSequence(self.storage, self._stored, self._index)
+
+    # --- отображение записи, которое задаёт подкласс ---
+
+    @staticmethod
+    def _to_record(obj: T) -> dict:
+        raise NotImplementedError
+
+    @staticmethod
+    def _to_object(item: dict) -> Optional[T]:
+        raise NotImplementedError
+
+    def _signature(self):
+        return self.storage.signature()
+
+    def _hydrator(self) -> Callable[[dict], Optional[T]]:
+        return self._to_object
+
+    def _object_stamp(self):
+        # Отметка данных, от которых объект зависит помимо своей записи; см. ObjectCache
+        return None
+
+    def _snapshot(self, obj: T) -> dict:
+        # Запись объекта, не делящая с ним списков и словарей: она становится сохранённой
+        # версией (record_origins, индекс в кэше) и не должна меняться вместе с объектом
+        return copy.deepcopy(self._to_record(obj))
+
+    # --- сообщения о записи; по умолчанию репозиторий молчит ---
+
+    def _on_saved(self, obj: T, changed: bool) -> None:
+        pass
+
+    def _on_deleted(self, record_id) -> None:
+        pass
+
+    def _on_saved_many(self, outcomes: Dict[Any, str]) -> None:
+        pass
+
+    # --- общая часть ---
+
+    def next_id(self) -> int:
+        return self.ids.next_id()
+
+    def _index(self) -> RecordIndex:
+        return self.cache.get(
+            self.storage.cache_key, self._signature(),
+            lambda: RecordIndex(
+                self.storage.load(), self.KEY, self._hydrator(),
+                self.cache.objects, self.storage.cache_key, self._object_stamp(),
+            ),
+        )
+
+    def _cached_index(self) -> Optional[RecordIndex]:
+        # Индекс из кэша, если он актуален; None — хранилище пришлось бы перечитать
+        return self.cache.peek(self.storage.cache_key, self._signature())
+
+    def _records_index(self, records: List[dict]) -> RecordIndex:
+        # Индекс над записями, выбранными запросом к движку; объекты — через общий кэш, как у полного
+        return RecordIndex(
+            records, self.KEY, self._hydrator(), self.cache.objects, self.storage.cache_key, self._object_stamp(),
+        )
+
+    def _stored(self, record_id) -> Optional[dict]:
+        # Текущая запись по ключу: из актуального индекса в кэше, иначе запросом к движку,
+        # если он так умеет (SQLite, память), — индекс ради одной записи не перестраивается
+        index = self._cached_index()
+        if index is None:
+            if hasattr(self.storage, "get"):
+                return self.storage.get(record_id)
+            index = self._index()
+        return index.record(record_id)
+
+    @contextmanager
+    def _writing(self, records: Sequence[dict] = (), record_ids: Sequence = ()):
+        # Своя запись под блокировкой хранилища: подписи до и после снимаются, пока чужая запись
+        # невозможна, поэтому актуальный индекс в кэше правится на месте, а не перечитывается.
+        # При ошибке неизвестно, что успело попасть в хранилище, — индекс сбрасывается
+        key = self.storage.cache_key
+        changed = [record[self.KEY] for record in records] + list(record_ids)
+        with self.storage.locked():
+            before = self._signature()
+            try:
+                yield
+            except BaseException:
+                self.cache.invalidate(key, changed)
+                raise
+            after = self._signature()
+            stamp = self._object_stamp()
+        self.cache.update(key, before, after, changed, lambda index: index.apply(records, record_ids, stamp))
+
+    def _write(self, record: dict) -> None:
+        save_record(self.storage, record, self._index, self._stored)
+
+    def save(self, obj: T) -> None:
+        # Объект из репозитория без присваиваний или запись, уже совпадающая с сохранённой, —
+        # писать нечего: ни перезаписи файла, ни новой версии хранилища
+        if is_clean(obj):
+            self._on_saved(obj, changed=False)
+            return
+        record = self._snapshot(obj)
+        if is_stored(record, self._stored(record[self.KEY])):
+            remember(obj, record)
+            self._on_saved(obj, changed=False)
+            return
+
+        # Обновляем запись с таким ID или добавляем новую
+        try:
+            with self._writing([record]):
+                check_conflict(obj, self.KEY, self._stored)
+                self._write(record)
+            remember(obj, record)
+        except IOError as e:
+            print(f"Ошибка записи {os.path.basename(self.filename)}: {e}")
+            raise
+        self._on_saved(obj, changed=True)
+
+    def find_all(self, lazy: bool = False) -> List[T]:
+        # lazy=True — представления для чтения без валидации; для изменений нужен materialize()
+        if lazy and self.VIEW is not None:
+            return self._index().views(self.VIEW)
+        return self._index().all()
+
+    def iter_all(self) -> Iterator[T]:
+        # Если кэш актуален — отдаём из него, иначе читаем хранилище по одной записи
+        index = self.cache.peek(self.storage.cache_key, self._signature())
+        if index is not None:
+            yield from index.all()
+            return
+        hydrate = self._hydrator()
+        for item in self.storage.iter_records():
+            obj = hydrate(item)
+            if obj is not None:
+                yield obj
+
+    def iter_where(self, predicate: Callable[[T], bool]) -> Iterator[T]:
+        return (obj for obj in self.iter_all() if predicate(obj))
+
+    def find_by_id(self, record_id) -> Optional[T]:
+        # Как и _stored: без актуального индекса движок с выборкой по ключу читает одну запись
+        index = self._cached_index()
+        if index is None and hasattr(self.storage, "get"):
+            record = self.storage.get(record_id)
+            return None if record is None else self._records_index([record]).get(record_id)
+        return (index if index is not None else self._index()).get(record_id)
+
+    def _queryable(self, *fields: Optional[str]) -> bool:
+        # SQLite выбирает записи по индексированным колонкам (COLUMNS) сам, не читая таблицу
+        return all(field is None or field in self.COLUMNS for field in fields) and hasattr(self.storage, "between")
+
+    def _find_by(self, field: str, value) -> List[T]:
+        # Объекты с заданным значением поля записи: из актуального индекса, иначе запросом к движку
+        index = self._cached_index()
+        if index is None and self._queryable(field):
+            return self._records_index(self.storage.find_by(field, value)).all()
+        return (index if index is not None else self._index()).find_by(field, value)
+
+    def _between(self, field: str, low, high, group_field: str = None, group_value=None) -> List[T]:
+        # Диапазон по полю записи (см. RecordIndex.between) — тем же путём, что и _find_by
+        index = self._cached_index()
+        if index is None and self._queryable(field, group_field):
+            records = self.storage.between(field, low, high, group_field, group_value)
+            return self._records_index(records).all()
+        return (index if index is not None else self._index()).between(field, low, high, group_field, group_value)
+
+    def select(self, fields: Sequence[str]) -> List[tuple]:
+        # Кортежи значений полей записи (имена как в файле) — для списков и подписей без объектов
+        return self._index().select(fields)
+
+    def find_page(self, offset: int = 0, limit: int = 50, order_by: str = None,
+                  descending: bool = False) -> List[T]:
+        # order_by — поле записи (по умолчанию ключ); порядок берётся из отсортированного индекса
+        return self._index().page(order_by or self.KEY, offset, limit, descending)
+
+    def find_after(self, cursor: Optional[tuple] = None, limit: int = 50, order_by: str = None,
+                   descending: bool = False) -> Tuple[List[T], Optional[tuple]]:
+        # Обход по курсору: следующая страница начинается строго после последней выданной записи
+        return self._index().after(order_by or self.KEY, cursor, limit, descending)
+
+    def delete(self, record_id) -> bool:
+        with self._writing(record_ids=[record_id]):
+            deleted = self.storage.delete(record_id, self._index)
+        if deleted:
+            self._on_deleted(record_id)
+        return deleted
+
+    def save_many(self, objects: List[T]) -> Dict[Any, str]:
+        # Одна загрузка и одна запись на весь пакет; итог — inserted/updated по каждому ID
+        records = [self._snapshot(obj) for obj in objects]
+        with self._writing(records):
+            for obj in objects:
+                check_conflict(obj, self.KEY, self._stored)
+            outcomes = self.storage.upsert_many(records, self._index)
+        for obj, record in zip(objects, records):
+            remember(obj, record)
+        self._on_saved_many(outcomes)
+        return outcomes
+
+    def delete_many(self, record_ids: List) -> Dict[Any, bool]:
+        record_ids = list(record_ids)
+        with self._writing(record_ids=record_ids):
+            return self.storage.delete_many(record_ids, self._index)
@@ -0,0 +1,171 @@
+# repositories/binary_format.py
+"""Компактный бинарный снимок записей репозитория.
+
+Записи хранятся по колонкам: числа — массивами int64, строки — одним блоком
+UTF-8 с таблицей концов, списки чисел — счётчиками и общим массивом.
+Запись, которая не укладывается в схему (лишнее поле, другой тип), целиком
+сохраняется как JSON, поэтому преобразование JSON → снимок → JSON без потерь.
+
+Формат файла (little-endian):
+    b"GYMB" | версия u16 | длина заголовка u32 | заголовок (JSON)
+    далее блоки колонок в порядке схемы и блок записей-исключений,
+    каждый блок — длина u32 и байты.
+"""
+import json
+import struct
+import sys
+from array import array
+from typing import List, Sequence, Tuple
+
+MAGIC = b"GYMB"
+VERSION = 1
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+Schema = Sequence[Tuple[str, str]]  # (поле, тип): int, bool, str, int_list
+
+
+def _fits(value, kind: str) -> bool:
+    if value is None:
+        return True
+    if kind == "int":
+        return type(value) is int and INT64_MIN <= value <= INT64_MAX
+    if kind == "bool":
+        return type(value) is bool
+    if kind == "str":
+        return type(value) is str
+    if kind == "int_list":
+        return type(value) is list and all(type(v) is int and INT64_MIN <= v <= INT64_MAX for v in value)
+    return False
+
+
+def _matches(record: dict, names: List[str], schema: Schema) -> bool:
+    # Порядок ключей тоже должен совпадать — иначе JSON после обратного преобразования будет другим
+    return list(record) == names and all(_fits(record[name], kind) for name, kind in schema)
+
+
+def _block(data: bytes) -> bytes:
+    return struct.pack("<I", len(data)) + data
+
+
+def _pack(typecode: str, values) -> bytes:
+    numbers = array(typecode, values)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return numbers.tobytes()
+
+
+def _encode_column(values: list, kind: str) -> bytes:
+    nulls = bytes(value is None for value in values)
+    if kind == "int":
+        data = _block(_pack("q", (0 if v is None else v for v in values)))
+    elif kind == "bool":
+        data = _block(bytes(bool(v) for v in values))
+    elif kind == "str":
+        # Концы строк считаем в символах: при чтении режем уже декодированный текст
+        ends = []
+        end = 0
+        for value in values:
+            end += len(value) if value is not None else 0
+            ends.append(end)
+        text = "".join(v for v in values if v is not None)
+        data = _block(_pack("I", ends)) + _block(text.encode("utf-8"))
+    elif kind == "int_list":
+        counts = [0 if v is None else len(v) for v in values]
+        flat = [v for value in values if value for v in value]
+        data = _block(_pack("I", counts)) + _block(_pack("q", flat))
+    else:
+        raise ValueError(f"Неизвестный тип колонки: {kind}")
+    return _block(nulls) + data
+
+
+def encode_records(records: List[dict], schema: Schema = ()) -> bytes:
+    names = [name for name, _ in schema]
+    packed, exceptions = [], []
+    for position, record in enumerate(records):
+        if schema and _matches(record, names, schema):
+            packed.append(record)
+        else:
+            exceptions.append([position, record])
+            packed.append(dict.fromkeys(names))
+    header = json.dumps({"schema": [list(field) for field in schema], "count": len(records)}).encode("utf-8")
+    parts = [MAGIC, struct.pack("<H", VERSION), _block(header)]
+    for name, kind in schema:
+        parts.append(_block(_encode_column([record[name] for record in packed], kind)))
+    parts.append(_block(json.dumps(exceptions, ensure_ascii=False, separators=(",", ":")).encode("utf-8")))
+    return b"".join(parts)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def take(self, size: int) -> memoryview:
+        chunk = self.data[self.offset:self.offset + size]
+        if len(chunk) != size:
+            raise ValueError("Снимок обрезан")
+        self.offset += size
+        return chunk
+
+    def block(self) -> memoryview:
+        (size,) = struct.unpack("<I", self.take(4))
+        return self.take(size)
+
+
+def _numbers(typecode: str, chunk: memoryview) -> list:
+    numbers = array(typecode)
+    numbers.frombytes(chunk)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return numbers.tolist()
+
+
+def _decode_column(reader: _Reader, kind: str, count: int) -> list:
+    nulls = bytes(reader.block())
+    if kind == "int":
+        values = _numbers("q", reader.block())
+    elif kind == "bool":
+        values = [b == 1 for b in reader.block()]
+    elif kind == "str":
+        ends = _numbers("I", reader.block())
+        text = bytes(reader.block()).decode("utf-8")
+        values = [text[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    elif kind == "int_list":
+        counts = _numbers("I", reader.block())
+        flat = _numbers("q", reader.block())
+        values, start = [], 0
+        for size in counts:
+            values.append(flat[start:start + size])
+            start += size
+    else:
+        raise ValueError(f"Неизвестный тип колонки: {kind}")
+    if len(values) != count:
+        raise ValueError("Снимок повреждён: длина колонки не совпадает с числом записей")
+    # Маску применяем, только если в колонке вообще есть None
+    if 1 in nulls:
+        values = [None if is_null else value for value, is_null in zip(values, nulls)]
+    return values
+
+
+def _build_rows(names: List[str], columns: List[list]) -> List[dict]:
+    # Имена полей пришли из заголовка файла — в словарь они попадают только как ключи
+    if not all(type(name) is str for name in names):
+        raise ValueError("Снимок повреждён: имя поля не строка")
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def decode_records(data: bytes) -> List[dict]:
+    reader = _Reader(data)
+    if bytes(reader.take(4)) != MAGIC:
+        raise ValueError("Это не бинарный снимок")
+    (version,) = struct.unpack("<H", reader.take(2))
+    if version != VERSION:
+        raise ValueError(f"Неподдерживаемая версия снимка: {version}")
+    header = json.loads(bytes(reader.block()))
+    schema, count = header["schema"], header["count"]
+    names = [name for name, _ in schema]
+    columns = [_decode_column(_Reader(reader.block()), kind, count) for _, kind in schema]
+    records = _build_rows(names, columns) if columns else [{} for _ in range(count)]
+    for position, record in json.loads(bytes(reader.block())):
+        records[position] = record
+    return records
@@ -0,0 +1,515 @@
+# repositories/cache.py
+import os
+import sys
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from functools import partial
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Бюджет памяти кэша объектов в мегабайтах; 0 — без ограничения
+DEFAULT_OBJECT_CACHE_MB = int(os.environ.get("GYM_OBJECT_CACHE_MB", "64"))
+
+
+def file_signature(filename: str) -> Optional[Tuple[int, int]]:
+    # (mtime в наносекундах, размер) — меняется при любой перезаписи файла
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Запись, из которой создан объект: по ней при сохранении видно, не изменил ли её кто-то ещё
+record_origins: "weakref.WeakKeyDictionary[Any, dict]" = weakref.WeakKeyDictionary()
+
+
+def estimate_size(obj: Any) -> int:
+    # Приблизительный размер: объект, словарь его полей и значения полей. Вложенные
+    # структуры, которые стоит учитывать целиком, сообщают размер сами через __sizeof__
+    fields = getattr(obj, "__dict__", None)
+    if fields is None:
+        return sys.getsizeof(obj)
+    return sys.getsizeof(obj) + sys.getsizeof(fields) + sum(map(sys.getsizeof, fields.values()))
+
+
+class ObjectCache:
+    """LRU-кэш созданных из записей объектов по ключу (сущность, ID).
+
+    Объём ограничен бюджетом в байтах (оценка — estimate_size). Кэш
+    сегментированный: новый объект попадает в пробный сегмент и переходит в
+    защищённый при повторном обращении по ID. Полные проходы (find_all,
+    страницы, выборки по полю) объекты не продвигают и ничего не вытесняют:
+    созданное ими занимает только свободное место бюджета. Поэтому часто
+    нужные участники остаются в памяти, даже если весь список в бюджет не
+    помещается, а повторный проход не гоняет кэш по кругу. Объект выдаётся,
+    только пока запись, из которой он создан, совпадает с текущей и в нём
+    нет несохранённых правок.
+    """
+
+    PROTECTED_SHARE = 0.8  # доля бюджета под защищённый сегмент
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes  # None — без ограничения
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # (сущность, ID) -> (запись, отметка зависимостей, объект, размер); в каждом сегменте — от давних к свежим
+        self._probation: "OrderedDict[Tuple[str, Any], Tuple[dict, Any, Any, int]]" = OrderedDict()
+        self._protected: "OrderedDict[Tuple[str, Any], Tuple[dict, Any, Any, int]]" = OrderedDict()
+        self._protected_size = 0
+
+    def get(self, entity: str, record_id, record: dict, stamp=None, promote: bool = True) -> Any:
+        # promote=False — чтение полным проходом: объект не переходит в защищённый сегмент
+        key = (entity, record_id)
+        segment = self._protected if key in self._protected else self._probation
+        entry = segment.get(key)
+        if entry is not None:
+            cached_record, cached_stamp, obj, _ = entry
+            fresh = (cached_record is record or cached_record == record) and cached_stamp == stamp
+            if fresh and not (hasattr(obj, "has_changes") and obj.has_changes()):
+                if segment is self._protected:
+                    if promote:
+                        segment.move_to_end(key)
+                elif promote:
+                    self._promote(key)
+                else:
+                    segment.move_to_end(key)
+                self.hits += 1
+                return obj
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def _promote(self, key: Tuple[str, Any]) -> None:
+        entry = self._probation.pop(key)
+        self._protected[key] = entry
+        self._protected_size += entry[3]
+        if self.max_bytes is None:
+            return
+        # Переполненный защищённый сегмент отдаёт давние объекты обратно в пробный
+        while self._protected_size > self.max_bytes * self.PROTECTED_SHARE:
+            demoted_key, demoted = self._protected.popitem(last=False)
+            self._protected_size -= demoted[3]
+            self._probation[demoted_key] = demoted
+
+    def put(self, entity: str, record_id, record: dict, obj: Any, stamp=None, evict: bool = True) -> None:
+        # evict=False — объект из полного прохода: кладётся, только если есть свободное место
+        key = (entity, record_id)
+        self._drop(key)
+        if self.max_bytes is None:
+            size = 0  # без бюджета размер не нужен, а оценка стоит почти как сама гидратация
+        else:
+            if not evict and self.size >= self.max_bytes:
+                return
+            size = estimate_size(obj)
+            if size > (self.max_bytes if evict else self.max_bytes - self.size):
+                return
+        self._probation[key] = (record, stamp, obj, size)
+        self.size += size
+        while self.max_bytes is not None and self.size > self.max_bytes:
+            if self._probation:
+                _, (_, _, _, evicted) = self._probation.popitem(last=False)
+            else:
+                _, (_, _, _, evicted) = self._protected.popitem(last=False)
+                self._protected_size -= evicted
+            self.size -= evicted
+            self.evictions += 1
+
+    def _drop(self, key: Tuple[str, Any]) -> None:
+        entry = self._probation.pop(key, None)
+        if entry is None:
+            entry = self._protected.pop(key, None)
+            if entry is None:
+                return
+            self._protected_size -= entry[3]
+        self.size -= entry[3]
+
+    def invalidate(self, entity: str, record_ids: Iterable) -> None:
+        for record_id in record_ids:
+            self._drop((entity, record_id))
+
+    def clear(self) -> None:
+        self._probation.clear()
+        self._protected.clear()
+        self.size = 0
+        self._protected_size = 0
+
+    def __contains__(self, key: Tuple[str, Any]) -> bool:
+        return key in self._probation or key in self._protected
+
+    def __len__(self) -> int:
+        return len(self._probation) + len(self._protected)
+
+
+class RecordIndex:
+    """Индекс записей файла по первичному ключу.
+
+    Хранит разобранные записи и позицию каждой по ID, а объекты создаёт
+    лениво: поиск по ID — одно обращение к словарю и одна гидратация.
+    С objects созданные объекты живут в общем ограниченном кэше под именем
+    entity, иначе индекс держит их сам, все до единого; stamp — отметка
+    данных, от которых объект зависит помимо своей записи.
+
+    Собственные записи репозитория вносятся на месте (apply): удалённая
+    запись оставляет дыру в списке, и дыры убираются при первом полном
+    проходе. Уже построенные вторичные индексы (группы, отсортированные
+    диапазоны, порядки страниц, представления) правятся вместе с записью,
+    поэтому сохранение и удаление не перестраивают ни один из них.
+    """
+
+    def __init__(self, records: List[dict], key: str, hydrate: Callable[[dict], Any],
+                 objects: ObjectCache = None, entity: str = None, stamp=None):
+        self._records = records
+        self._holes = 0  # удалённые записи, на месте которых в _records стоит None
+        self.key = key
+        self._hydrate = hydrate
+        self._cache = objects
+        self._entity = entity
+        self._stamp = stamp
+        self._objects: Dict[int, Any] = {}
+        self._all: Optional[List[Any]] = None
+        self.positions: Dict[Any, int] = {}
+        for position, record in enumerate(records):
+            # При дублях ID побеждает первая запись — как при линейном поиске
+            self.positions.setdefault(record.get(key), position)
+        # С дублями правка на месте разошлась бы с перечитыванием — такой индекс только строится заново
+        self._duplicates = len(self.positions) != len(records)
+        # Вторичные индексы строятся при первом запросе по полю и живут, пока жив кэш
+        self._groups: Dict[str, Dict[Any, List[int]]] = {}
+        self._sorted: Dict[Tuple, Tuple[List[Any], List[int]]] = {}
+        self._views: Dict[type, List[Any]] = {}
+        self._orders: Dict[str, Tuple[List[Tuple], List[int]]] = {}
+
+    @property
+    def records(self) -> List[dict]:
+        # Снаружи и в полных проходах записи видны без дыр; позиции в positions указывают в этот список
+        if self._holes:
+            self._compact()
+        return self._records
+
+    def _compact(self) -> None:
+        renumbered: Dict[int, int] = {}
+        records: List[dict] = []
+        for position, record in enumerate(self._records):
+            if record is not None:
+                renumbered[position] = len(records)
+                records.append(record)
+        self._records = records
+        self._holes = 0
+        self.positions = {record_id: renumbered[position] for record_id, position in self.positions.items()}
+        self._objects = {renumbered[position]: obj for position, obj in self._objects.items()}
+        # Перенумерация монотонна, поэтому порядок позиций во вторичных индексах сохраняется
+        for groups in self._groups.values():
+            for members in groups.values():
+                members[:] = [renumbered[position] for position in members]
+        for _, positions in chain(self._sorted.values(), self._orders.values()):
+            positions[:] = [renumbered[position] for position in positions]
+        for view_class, views in self._views.items():
+            self._views[view_class] = [view for view in views if view is not None]
+
+    def apply(self, records: Sequence[dict] = (), record_ids: Iterable = (), stamp=None) -> bool:
+        """Вносит собственную запись репозитория: сохранённые записи и удалённые ID.
+
+        Возвращает False, если индекс нельзя поправить на месте (в данных
+        дубли ID, изменились данные, от которых зависят объекты), — тогда
+        его нужно построить заново.
+        """
+        if self._duplicates or stamp != self._stamp:
+            return False
+        for record in records:
+            record_id = record.get(self.key)
+            position = self.positions.get(record_id)
+            if position is None:
+                position = self.positions[record_id] = len(self._records)
+                self._records.append(record)
+            else:
+                self._unlink(position, self._records[position])
+                self._records[position] = record
+                self._objects.pop(position, None)
+            self._link(position, record)
+        for record_id in record_ids:
+            position = self.positions.pop(record_id, None)
+            if position is not None:
+                self._unlink(position, self._records[position])
+                self._records[position] = None
+                self._objects.pop(position, None)
+                self._holes += 1
+        self._all = None
+        # Дыр больше, чем записей, — убираем их сразу, чтобы память не росла
+        if self._holes > len(self.positions):
+            self._compact()
+        return True
+
+    def _link(self, position: int, record: dict) -> None:
+        # Вносит запись в построенные вторичные индексы; позиции в них упорядочены так же, как при построении
+        for field, groups in self._groups.items():
+            insort(groups.setdefault(record.get(field), []), position)
+        for (field, group_field, group_value), (values, positions) in self._sorted.items():
+            if record.get(field) is None or (group_field is not None and record.get(group_field) != group_value):
+                continue
+            i = self._sorted_slot(values, positions, record[field], position)
+            values.insert(i, record[field])
+            positions.insert(i, position)
+        for field, (sort_keys, positions) in self._orders.items():
+            sort_key = self._sort_key(record, field)
+            i = bisect_left(sort_keys, sort_key)
+            sort_keys.insert(i, sort_key)
+            positions.insert(i, position)
+        for view_class, views in self._views.items():
+            view = view_class(record, partial(self.get, record.get(self.key)))
+            if position == len(views):
+                views.append(view)
+            else:
+                views[position] = view
+
+    def _unlink(self, position: int, record: dict) -> None:
+        # Убирает прежнюю версию записи из построенных вторичных индексов
+        for field, groups in self._groups.items():
+            members = groups[record.get(field)]
+            members.pop(bisect_left(members, position))
+            if not members:
+                del groups[record.get(field)]
+        for (field, group_field, group_value), (values, positions) in self._sorted.items():
+            if record.get(field) is None or (group_field is not None and record.get(group_field) != group_value):
+                continue
+            i = self._sorted_slot(values, positions, record[field], position)
+            del values[i], positions[i]
+        for field, (sort_keys, positions) in self._orders.items():
+            i = bisect_left(sort_keys, self._sort_key(record, field))
+            del sort_keys[i], positions[i]
+        for views in self._views.values():
+            views[position] = None  # дыра, как в _records; убирается в _compact
+
+    @staticmethod
+    def _sorted_slot(values: List[Any], positions: List[int], value, position: int) -> int:
+        # Место пары (значение, позиция) в отсортированном индексе: среди равных значений — по позиции
+        start = bisect_left(values, value)
+        return bisect_left(positions, position, start, bisect_right(values, value, start))
+
+    def _create(self, record: dict) -> Any:
+        obj = self._hydrate(record)
+        if obj is not None:
+            record_origins[obj] = record
+            # Поля, заданные конструктором при чтении, изменениями не считаются
+            if hasattr(obj, "mark_clean"):
+                obj.mark_clean()
+        return obj
+
+    def _object_at(self, position: int, scan: bool = False) -> Any:
+        # scan=True — полный проход: в общем кэше объект не продвигается и ничего не вытесняет
+        record = self._records[position]
+        if self._cache is not None:
+            record_id = record.get(self.key)
+            obj = self._cache.get(self._entity, record_id, record, self._stamp, promote=not scan)
+            if obj is None:
+                obj = self._create(record)
+                if obj is not None:
+                    self._cache.put(self._entity, record_id, record, obj, self._stamp, evict=not scan)
+            return obj
+        if position not in self._objects:
+            self._objects[position] = self._create(record)
+        return self._objects[position]
+
+    def get(self, record_id) -> Any:
+        position = self.positions.get(record_id)
+        if position is None:
+            return None
+        return self._object_at(position)
+
+    def record(self, record_id) -> Optional[dict]:
+        # Сама запись по ID, без создания объекта
+        position = self.positions.get(record_id)
+        return None if position is None else self._records[position]
+
+    def all(self) -> List[Any]:
+        # С общим кэшем список не запоминается: он удерживал бы в памяти все объекты сразу
+        if self._cache is not None:
+            return self._hydrate_positions(range(len(self.records)))
+        if self._all is None:
+            self._all = self._hydrate_positions(range(len(self.records)))
+        return list(self._all)
+
+    def views(self, view_class: type) -> List[Any]:
+        # Представления без гидратации; полный объект — через get по ID записи.
+        # records убирает дыры, и вместе с ними — пустые места в уже построенных списках
+        records = self.records
+        if view_class not in self._views:
+            self._views[view_class] = [
+                view_class(record, partial(self.get, record.get(self.key))) for record in records
+            ]
+        return list(self._views[view_class])
+
+    def select(self, fields: Sequence[str]) -> List[tuple]:
+        # Проекция: значения полей прямо из записей, без создания объектов
+        return [tuple(record.get(field) for field in fields) for record in self.records]
+
+    def _hydrate_positions(self, positions: List[int]) -> List[Any]:
+        objects = (self._object_at(position, scan=True) for position in positions)
+        return [obj for obj in objects if obj is not None]
+
+    def _group(self, field: str) -> Dict[Any, List[int]]:
+        if field not in self._groups:
+            groups: Dict[Any, List[int]] = {}
+            for position, record in enumerate(self.records):
+                groups.setdefault(record.get(field), []).append(position)
+            self._groups[field] = groups
+        return self._groups[field]
+
+    def find_by(self, field: str, value) -> List[Any]:
+        return self._hydrate_positions(self._group(field).get(value, []))
+
+    def values(self, field: str) -> List[Any]:
+        return list(self._group(field))
+
+    def _sorted_by(self, field: str, group_field: str = None, group_value=None) -> Tuple[List[Any], List[int]]:
+        # Отдельный отсортированный индекс на каждую группу (например, на каждый зал)
+        sort_key = (field, group_field, group_value)
+        if sort_key not in self._sorted:
+            records = self.records
+            if group_field is None:
+                candidates = range(len(records))
+            else:
+                candidates = self._group(group_field).get(group_value, [])
+            # Записи без значения поля в диапазонные запросы не попадают
+            pairs = sorted(
+                (records[position][field], position)
+                for position in candidates
+                if records[position].get(field) is not None
+            )
+            self._sorted[sort_key] = [value for value, _ in pairs], [position for _, position in pairs]
+        return self._sorted[sort_key]
+
+    def between(self, field: str, low, high, group_field: str = None, group_value=None) -> List[Any]:
+        # Границы включительно, None — без границы; поиск по отсортированным значениям — бинарный
+        values, positions = self._sorted_by(field, group_field, group_value)
+        start = 0 if low is None else bisect_left(values, low)
+        end = len(values) if high is None else bisect_right(values, high)
+        return self._hydrate_positions(positions[start:end])
+
+    def _order(self, field: str) -> Tuple[List[Tuple], List[int]]:
+        # Полный порядок для страниц: (нет значения, значение, ID); записи без значения — в конце
+        if field not in self._orders:
+            pairs = sorted((self._sort_key(record, field), position) for position, record in enumerate(self.records))
+            self._orders[field] = [sort_key for sort_key, _ in pairs], [position for _, position in pairs]
+        return self._orders[field]
+
+    def _sort_key(self, record: dict, field: str) -> Tuple:
+        return record.get(field) is None, record.get(field), record.get(self.key)
+
+    def page(self, field: str, offset: int, limit: int, descending: bool = False) -> List[Any]:
+        _, positions = self._order(field)
+        if descending:
+            positions = positions[::-1]
+        return self._hydrate_positions(positions[offset:offset + limit])
+
+    def after(self, field: str, cursor: Optional[Tuple], limit: int,
+              descending: bool = False) -> Tuple[List[Any], Optional[Tuple]]:
+        """Страница по курсору: записи строго после cursor в выбранном порядке.
+
+        Курсор — ключ сортировки последней выданной записи; None — с начала.
+        Возвращает объекты и курсор следующей страницы (None, если дальше пусто).
+        """
+        sort_keys, positions = self._order(field)
+        if descending:
+            step = -1
+            i = len(positions) - 1 if cursor is None else bisect_left(sort_keys, cursor) - 1
+        else:
+            step = 1
+            i = 0 if cursor is None else bisect_right(sort_keys, cursor)
+        objects = []
+        last = None
+        while 0 <= i < len(positions) and len(objects) < limit:
+            obj = self._object_at(positions[i], scan=True)
+            if obj is not None:
+                objects.append(obj)
+                last = sort_keys[i]
+            i += step
+        more = 0 <= i < len(positions)
+        return objects, (last if more else None)
+
+    def __contains__(self, record_id) -> bool:
+        return record_id in self.positions
+
+    def __len__(self) -> int:
+        return len(self._records) - self._holes
+
+
+class RepositoryCache:
+    """Общий для всех репозиториев кэш загруженных объектов.
+
+    Запись живёт, пока не изменится подпись хранилища (mtime/размер файла,
+    версия базы, а также подписи зависимостей) либо пока репозиторий сам
+    не сбросит её после сохранения. Объекты из записей индексы держат в
+    objects — ограниченном кэше, общем для всех сущностей.
+    """
+
+    def __init__(self, object_budget_mb: int = DEFAULT_OBJECT_CACHE_MB):
+        self._entries: Dict[str, Tuple[Any, Any]] = {}
+        self.objects = ObjectCache(object_budget_mb * 1024 * 1024 if object_budget_mb else None)
+        self._listeners: List[Callable[..., None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, signature, loader: Callable[[], Any]) -> Any:
+        # Подпись снимается до загрузки: если данные поменяются во время чтения,
+        # следующее обращение увидит новую подпись и перечитает их
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = loader()
+        self._entries[key] = (signature, value)
+        return value
+
+    def peek(self, key: str, signature) -> Any:
+        # Значение без загрузки: None, если в кэше нет актуальной записи
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+        return None
+
+    def add_listener(self, listener: Callable[..., None]) -> None:
+        # Слушатель узнаёт о каждой записи репозитория: listener(key, record_ids, before, after)
+        # после update — какие ID изменились между подписями before и after; listener(key)
+        # после invalidate — что изменилось, неизвестно
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[..., None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def update(self, key: str, before, after, record_ids: Iterable, change: Callable[[Any], bool]) -> None:
+        """Учитывает собственную запись репозитория без перечитывания хранилища.
+
+        Если значение в кэше было актуально до записи (подпись before),
+        change правит его на месте, и оно остаётся в кэше под подписью после
+        записи. Иначе, или если change вернул False, запись сбрасывается,
+        как в invalidate.
+        """
+        record_ids = list(record_ids)
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[0] == before and change(entry[1]):
+            self._entries[key] = (after, entry[1])
+        self.objects.invalidate(key, record_ids)
+        for listener in list(self._listeners):
+            listener(key, record_ids, before, after)
+
+    def invalidate(self, key: str, record_ids: Iterable = ()) -> None:
+        # Объекты остальных записей остаются: при следующем чтении их проверят по записи
+        self._entries.pop(key, None)
+        self.objects.invalidate(key, record_ids)
+        for listener in list(self._listeners):
+            listener(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.objects.clear()
+
+
+shared_cache = RepositoryCache()
@@ -0,0 +1,146 @@
+# repositories/changes.py
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from repositories.cache import RepositoryCache, shared_cache
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+
+class Change(NamedTuple):
+    kind: str  # INSERT, UPDATE или DELETE
+    record_id: Any
+    obj: Any  # новое состояние объекта; None при удалении
+
+
+class ChangeFeed:
+    """Лента изменений репозиториев для интерфейса.
+
+    Подписчик получает только изменившиеся записи: вставки, правки и
+    удаления. Свои сохранения приходят сразу — лента слушает кэш после
+    записи и сверяет только записанные ID. Чужие (другой процесс, другое
+    рабочее место) находит poll(): он сравнивает подпись хранилища (версию
+    и mtime файла) и, только если она изменилась, перечитывает записи и
+    сверяет их с последним снимком целиком.
+
+        feed = ChangeFeed()
+        feed.subscribe(member_repo, members_tab.apply_member_changes)
+        timer.timeout.connect(feed.poll)
+    """
+
+    def __init__(self, cache: RepositoryCache = shared_cache):
+        self.cache = cache
+        self._subscriptions: Dict[str, Dict[str, Any]] = {}
+        # Очередь событий: (ключ, ID, подпись до записи, после); ID None — полная сверка
+        self._pending: List[tuple] = []
+        self._dispatching = False
+        cache.add_listener(self._on_invalidate)
+
+    def subscribe(self, repo, callback: Callable[[List[Change]], None]) -> None:
+        key = repo.storage.cache_key
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            signature = repo._signature()
+            subscription = {
+                "repo": repo,
+                "signature": signature,
+                "records": self._snapshot(repo._index()),
+                "callbacks": [],
+            }
+            self._subscriptions[key] = subscription
+        subscription["callbacks"].append(callback)
+
+    def close(self) -> None:
+        self.cache.remove_listener(self._on_invalidate)
+        self._subscriptions.clear()
+
+    def poll(self) -> None:
+        # Дешёвая проверка: stat файла и чтение версии, без разбора данных
+        for key, subscription in list(self._subscriptions.items()):
+            if subscription["repo"]._signature() != subscription["signature"]:
+                self._schedule((key, None, None, None))
+
+    def _on_invalidate(self, key: str, record_ids: Optional[List] = None, before=None, after=None) -> None:
+        if key in self._subscriptions:
+            self._schedule((key, record_ids, before, after))
+
+    def _schedule(self, event: tuple) -> None:
+        # Подписчик может сам что-то сохранить — тогда его изменения
+        # разошлются после текущих, а не посреди них. Уже ждущая полная
+        # сверка хранилища покроет и это событие
+        if (event[0], None, None, None) not in self._pending:
+            self._pending.append(event)
+        if self._dispatching:
+            return
+        self._dispatching = True
+        try:
+            while self._pending:
+                self._dispatch(*self._pending.pop(0))
+        finally:
+            self._dispatching = False
+
+    def _dispatch(self, key: str, record_ids: Optional[List], before, after) -> None:
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            return
+        repo = subscription["repo"]
+        if record_ids is not None and subscription["signature"] == before:
+            # Своя запись, и снимок был актуален до неё: между before и after менялись
+            # только эти ID — сверяем их по одному, не читая всё хранилище
+            records = subscription["records"]
+            changes = []
+            for record_id in dict.fromkeys(record_ids):
+                record = repo._stored(record_id)
+                change = self._change(record_id, records.get(record_id), record, repo.find_by_id)
+                if record is None:
+                    records.pop(record_id, None)
+                else:
+                    records[record_id] = record
+                if change is not None:
+                    changes.append(change)
+            subscription["signature"] = after
+        else:
+            # Подпись снимается до чтения: запись, попавшая между ними, даст ещё одно событие
+            signature = repo._signature()
+            index = repo._index()
+            records = self._snapshot(index)
+            changes = self._diff(subscription["records"], records, index)
+            subscription["signature"] = signature
+            subscription["records"] = records
+        if changes:
+            for callback in list(subscription["callbacks"]):
+                # Ошибка подписчика не должна выглядеть как ошибка сохранения, после которого пришло событие
+                try:
+                    callback(changes)
+                except Exception as e:
+                    print(f"Ошибка обработки изменений: {e}")
+
+    @staticmethod
+    def _snapshot(index) -> Dict[Any, dict]:
+        # Как и в индексе, при дублях ID учитывается первая запись
+        return {record_id: index.records[position] for record_id, position in index.positions.items()}
+
+    @staticmethod
+    def _change(record_id, previous: Optional[dict], record: Optional[dict],
+                get: Callable[[Any], Any]) -> Optional[Change]:
+        # previous — запись в снимке, record — текущая; None — записи нет
+        if previous is record or previous == record:
+            return None
+        if record is None:
+            return Change(DELETE, record_id, None)
+        obj = get(record_id)
+        if obj is not None:
+            return Change(UPDATE if previous is not None else INSERT, record_id, obj)
+        if previous is not None:
+            # Запись есть, но объекта из неё не собрать (нет зала или тренера занятия,
+            # некорректные поля) — для вкладки она пропала, как и в find_all
+            return Change(DELETE, record_id, None)
+        return None
+
+    @classmethod
+    def _diff(cls, old: Dict[Any, dict], new: Dict[Any, dict], index) -> List[Change]:
+        changes = [cls._change(record_id, old.get(record_id), record, index.get) for record_id, record in new.items()]
+        changes += [cls._change(record_id, record, None, index.get) for record_id, record in old.items()
+                    if record_id not in new]
+        return [change for change in changes if change is not None]
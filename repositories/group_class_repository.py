@@ -1,42 +1,49 @@
 # repositories/group_class_repository.py
-import json
-import os
 from datetime import datetime
-from typing import List
-from classes.group_class import GroupClass
+from typing import Dict, List
+from classes.group_class import AttendeeSet, GroupClass
+from repositories.base_repository import BaseRepository
 from repositories.coach_repository import CoachRepository
 from repositories.gym_room_repository import GymRoomRepository
-
-class GroupClassRepository:
-    def __init__(self, filename: str = "data/group_classes.json"):
-        self.filename = filename
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-    def _load_raw_data(self) -> List[dict]:
-        if not os.path.exists(self.filename):
-            return []
-        try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    return []
-                return json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"Ошибка чтения group_classes.json: {e}")
-            return []
-
-    def _save_raw_data(self, data: List[dict]) -> None:
-        try:
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except IOError as e:
-            print(f"Ошибка записи group_classes.json: {e}")
-
-    def save(self, cls: GroupClass) -> None:
-        data = self._load_raw_data()
-
+from repositories.cache import RecordIndex, RepositoryCache, shared_cache
+from repositories.json_codec import JsonCodec
+from repositories.storage import DEFAULT_DB_PATH
+
+class GroupClassRepository(BaseRepository[GroupClass]):
+    TABLE = "group_classes"
+    KEY = "class_id"
+    COLUMNS = ("coach_id", "room_id", "schedule")
+    BINARY_SCHEMA = (
+        ("class_id", "int"), ("class_name", "str"), ("coach_id", "int"), ("room_id", "int"),
+        ("schedule", "str"), ("max_capacity", "int"), ("current_attendees", "int"), ("attendees_delta", "int_list"),
+    )
+
+    def __init__(self, filename: str = "data/group_classes.json", cache: RepositoryCache = shared_cache,
+                 engine: str = None, db_path: str = DEFAULT_DB_PATH, codec: str | JsonCodec = None,
+                 coach_repo: CoachRepository = None, room_repo: GymRoomRepository = None):
+        # Откуда брать тренеров и залов; по умолчанию — репозитории над тем же кэшем и движком
+        self.coach_repo = coach_repo or CoachRepository(cache=cache, engine=engine, db_path=db_path)
+        self.room_repo = room_repo or GymRoomRepository(cache=cache, engine=engine, db_path=db_path)
+        super().__init__(filename, cache, engine, db_path, codec)
+
+    def _signature(self):
+        # Занятия ссылаются на тренеров и залы, поэтому кэш зависит и от их данных
+        return self.storage.signature(), self.coach_repo.storage.signature(), self.room_repo.storage.signature()
+
+    def _hydrator(self):
+        # Индексы тренеров и залов берутся один раз на загрузку; дальше — только поиск в словаре
+        coaches = self.coach_repo._index()
+        rooms = self.room_repo._index()
+        return lambda item: self._to_group_class(item, coaches, rooms)
+
+    def _object_stamp(self):
+        # Занятие держит объекты тренера и зала — после их изменения занятие создаётся заново
+        return self.coach_repo.storage.signature(), self.room_repo.storage.signature()
+
+    @staticmethod
+    def _to_record(cls: GroupClass) -> dict:
         # Преобразуем объект в словарь
-        cls_dict = {
+        return {
             "class_id": cls.class_id,
             "class_name": cls.class_name,
             "coach_id": cls.coach.id,
@@ -44,84 +51,80 @@ class GroupClassRepository:
             "schedule": cls.schedule.isoformat() if cls.schedule else None,  # ISO 8601
             "max_capacity": cls.max_capacity,
             "current_attendees": cls.current_attendees,
-            "attendees": cls.attendees,
+            # Участники — разностями отсортированных ID, см. AttendeeSet
+            "attendees_delta": cls.attendees.to_deltas(),
         }
 
-        # Обновляем существующий или добавляем новый
-        updated = False
-        for i, item in enumerate(data):
-            if item["class_id"] == cls.class_id:
-                data[i] = cls_dict
-                updated = True
-                break
-
-        if not updated:
-            data.append(cls_dict)
-
-        self._save_raw_data(data)
-        print(f"Занятие '{cls.class_name}' сохранено.")
-
-    def find_all(self) -> List[GroupClass]:
-        data = self._load_raw_data()
-        classes = []
-
-        # Загружаем зависимости
-        coach_repo = CoachRepository()
-        room_repo = GymRoomRepository()
-        coaches = {c.id: c for c in coach_repo.find_all()}  # dict по id
-        rooms = {r.room_id: r for r in room_repo.find_all()}  # dict по room_id
-
-        for item in data:
-            try:
-                # Проверка наличия обязательных полей
-                required_fields = [
-                    "class_id", "class_name", "coach_id", "room_id",
-                    "schedule", "max_capacity", "current_attendees"
-                ]
-                for field in required_fields:
-                    if field not in item:
-                        raise KeyError(f"Отсутствует обязательное поле: {field}")
-
-                coach = coaches.get(item["coach_id"])
-                room = rooms.get(item["room_id"])
-
-                if coach is None:
-                    print(f"Тренер с ID {item['coach_id']} не найден для занятия {item['class_id']}")
-                    continue
-                if room is None:
-                    print(f"Зал с ID {item['room_id']} не найден для занятия {item['class_id']}")
-                    continue
-
-                group_class = GroupClass(
-                    class_id=item["class_id"],
-                    class_name=item["class_name"],
-                    coach=coach,
-                    room=room,
-                    schedule=datetime.fromisoformat(item["schedule"]) if item["schedule"] else None,
-                    max_capacity=item["max_capacity"],
-                    current_attendees=item["current_attendees"],
-                    attendees=item.get("attendees", [])
+    @staticmethod
+    def _to_group_class(item: dict, coaches: RecordIndex, rooms: RecordIndex) -> GroupClass | None:
+        try:
+            # Проверка наличия обязательных полей
+            required_fields = [
+                "class_id", "class_name", "coach_id", "room_id",
+                "schedule", "max_capacity"
+            ]
+            for field in required_fields:
+                if field not in item:
+                    raise KeyError(f"Отсутствует обязательное поле: {field}")
+
+            # Тренер и зал — по индексу их репозиториев, без полной загрузки
+            coach = coaches.get(item["coach_id"])
+            room = rooms.get(item["room_id"])
+
+            if coach is None:
+                print(f"Тренер с ID {item['coach_id']} не найден для занятия {item['class_id']}")
+                return None
+            if room is None:
+                print(f"Зал с ID {item['room_id']} не найден для занятия {item['class_id']}")
+                return None
+
+            return GroupClass(
+                class_id=item["class_id"],
+                class_name=item["class_name"],
+                coach=coach,
+                room=room,
+                schedule=datetime.fromisoformat(item["schedule"]) if item["schedule"] else None,
+                max_capacity=item["max_capacity"],
+                # Старые записи хранят участников списком, новые — разностями
+                attendees=(
+                    AttendeeSet.from_deltas(item["attendees_delta"]) if "attendees_delta" in item
+                    else AttendeeSet(item.get("attendees", []))
                 )
-                classes.append(group_class)
-
-            except (KeyError, ValueError) as e:
-                print(f"Рекорректная запись занятия: {e}")
-                continue
-
-        return classes
-
-    def find_by_id(self, class_id: int) -> GroupClass|None:
-        for cls in self.find_all():
-            if cls.class_id == class_id:
-                return cls
-        return None
-
-    def delete(self, class_id: int) -> bool:
-        data = self._load_raw_data()
-        for i, item in enumerate(data):
-            if item["class_id"] == class_id:
-                del data[i]
-                self._save_raw_data(data)
-                print(f"Групповое занятие с ID {class_id} удалено.")
-                return True
-        return False
\ No newline at end of file
+            )
+
+        except (KeyError, ValueError) as e:
+            print(f"Рекорректная запись занятия: {e}")
+            return None
+
+    # Выборки ниже идут по индексу, отсортированному по расписанию (в SQLite — по индексам колонок);
+    # занятия без даты в них не попадают
+
+    def find_between(self, start: datetime, end: datetime, room_id: int = None, coach_id: int = None) -> List[GroupClass]:
+        # Границы включительно; ISO-строки расписания сортируются как даты
+        low, high = start.isoformat(), end.isoformat()
+        if room_id is not None:
+            classes = self._between("schedule", low, high, "room_id", room_id)
+            if coach_id is not None:
+                classes = [c for c in classes if c.coach.id == coach_id]
+            return classes
+        if coach_id is not None:
+            return self._between("schedule", low, high, "coach_id", coach_id)
+        return self._between("schedule", low, high)
+
+    def find_by_room(self, room_id: int) -> List[GroupClass]:
+        return self._between("schedule", None, None, "room_id", room_id)
+
+    def find_by_coach(self, coach_id: int) -> List[GroupClass]:
+        return self._between("schedule", None, None, "coach_id", coach_id)
+
+    def _on_saved(self, cls: GroupClass, changed: bool) -> None:
+        if changed:
+            print(f"Занятие '{cls.class_name}' сохранено.")
+        else:
+            print(f"Занятие '{cls.class_name}' без изменений.")
+
+    def _on_deleted(self, class_id: int) -> None:
+        print(f"Групповое занятие с ID {class_id} удалено.")
+
+    def _on_saved_many(self, outcomes: Dict[int, str]) -> None:
+        print(f"Занятий сохранено: {len(outcomes)}")
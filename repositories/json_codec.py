@@ -0,0 +1,90 @@
+# repositories/json_codec.py
+import json
+import os
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без неё работает стандартный json
+    orjson = None
+
+
+class JsonCodec:
+    """Перевод записей хранилища в JSON и обратно.
+
+    indent=None — компактный вид без отступов и пробелов после разделителей,
+    indent=2 — для чтения глазами. При fast=True и установленном orjson
+    кодирование и разбор идут через него, иначе через стандартный json;
+    файлы одинаковы и читаются любым из них. То, чего orjson не умеет
+    записать (целые больше 64 бит, ключи не строками), уходит в стандартный
+    json. Читает такие целые orjson как float — для данных с ними fast=False.
+    """
+
+    def __init__(self, indent: int = None, fast: bool = True):
+        self.indent = indent
+        self.fast = fast
+        # orjson умеет только отступ в 2 пробела
+        self._orjson_option = None
+        if fast and orjson is not None and indent in (None, 2):
+            self._orjson_option = orjson.OPT_INDENT_2 if indent else 0
+
+    @property
+    def uses_orjson(self) -> bool:
+        return self._orjson_option is not None
+
+    def _stdlib_dumps(self, value: Any) -> str:
+        if self.indent is None:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        return json.dumps(value, ensure_ascii=False, indent=self.indent)
+
+    def dumpb(self, value: Any) -> bytes:
+        # Байты UTF-8 — сразу для записи в файл, открытый в двоичном режиме
+        if self.uses_orjson:
+            try:
+                return orjson.dumps(value, option=self._orjson_option)
+            except TypeError:
+                pass
+        return self._stdlib_dumps(value).encode("utf-8")
+
+    def dumps(self, value: Any) -> str:
+        if self.uses_orjson:
+            try:
+                return orjson.dumps(value, option=self._orjson_option).decode("utf-8")
+            except TypeError:
+                pass
+        return self._stdlib_dumps(value)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if self.uses_orjson:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass  # например, NaN — его понимает только json; испорченные данные отклонит и он
+        return json.loads(data)
+
+    def single_line(self) -> "JsonCodec":
+        # Журнал и база хранят одну запись в одной строке — отступы там не нужны
+        if self.indent is None:
+            return self
+        return JsonCodec(fast=self.fast)
+
+
+COMPACT = JsonCodec()
+PRETTY = JsonCodec(indent=2)  # вид файлов до появления кодеков
+
+# Форматы по имени — значение codec= в репозитории или GYM_JSON_CODEC
+CODECS: Dict[str, JsonCodec] = {
+    "compact": COMPACT,
+    "pretty": PRETTY,
+    "stdlib": JsonCodec(fast=False),
+}
+DEFAULT_CODEC = os.environ.get("GYM_JSON_CODEC", "compact")
+
+
+def get_codec(codec: Union[str, JsonCodec, None] = None) -> JsonCodec:
+    if isinstance(codec, JsonCodec):
+        return codec
+    name = codec or DEFAULT_CODEC
+    if name not in CODECS:
+        raise ValueError(f"Неизвестный формат JSON: {name}")
+    return CODECS[name]
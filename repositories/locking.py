@@ -0,0 +1,165 @@
+# repositories/locking.py
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from classes.people import GymBaseException
+from repositories.cache import record_origins
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ConcurrentModificationError(GymBaseException):
+    """Запись в хранилище изменили или удалили после того, как из неё был создан объект."""
+
+    def __init__(self, record_id):
+        message = f"Запись {record_id} изменена или удалена после того, как её прочитали. Обновите данные и повторите."
+        details = {
+            'record_id': record_id,
+        }
+        super().__init__(message, error_code="DATA_001", details=details)
+
+
+def sidecar(cache_key: str, suffix: str) -> str:
+    # Служебный файл рядом с данными: members.json.lock, gym.db.members.version...
+    return cache_key.replace("#", ".") + suffix
+
+
+class FileLock:
+    """Эксклюзивная advisory-блокировка файла между процессами (flock / msvcrt).
+
+    Повторный захват тем же потоком не блокируется: блокировку держит
+    внешний захват, внутренние только увеличивают счётчик.
+    """
+
+    _held: Dict[str, List[Any]] = {}  # путь -> [файл, глубина]
+    _guard = threading.RLock()
+    # Сколько захватов держит поток и что выполнить, когда он отпустит последний (см. after_unlock)
+    _thread = threading.local()
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self) -> "FileLock":
+        # RLock держится всё время блокировки: потоки одного процесса тоже ждут друг друга
+        self._guard.acquire()
+        try:
+            if self.path in self._held:
+                self._held[self.path][1] += 1
+            else:
+                f = open(self.path, "a+")
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                except BaseException:
+                    f.close()
+                    raise
+                self._held[self.path] = [f, 1]
+        except BaseException:
+            self._guard.release()
+            raise
+        self._thread.depth = getattr(self._thread, "depth", 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            held = self._held[self.path]
+            held[1] -= 1
+            if held[1] == 0:
+                del self._held[self.path]
+                f = held[0]
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                f.close()
+        finally:
+            self._thread.depth -= 1
+            self._guard.release()
+        if self._thread.depth == 0:
+            callbacks = getattr(self._thread, "callbacks", [])
+            self._thread.callbacks = []
+            for callback in callbacks:
+                callback()
+
+
+def after_unlock(callback: Callable[[], None]) -> None:
+    """Выполняет callback, когда текущий поток отпустит все блокировки файлов.
+
+    Так можно дождаться чего-то долгого (fsync группового коммита), не держа
+    блокировку, которую ждут другие. Без блокировок callback выполняется сразу.
+    """
+    if getattr(FileLock._thread, "depth", 0) == 0:
+        callback()
+        return
+    if not hasattr(FileLock._thread, "callbacks"):
+        FileLock._thread.callbacks = []
+    FileLock._thread.callbacks.append(callback)
+
+
+def read_version(path: str) -> int:
+    # Чтение без блокировки: файл версии всегда заменяется целиком
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def check_conflict(obj, key: str, stored: Callable[[Any], Optional[dict]]) -> None:
+    """Оптимистическая проверка перед сохранением объекта, прочитанного из репозитория.
+
+    Если запись на диске уже не та, из которой объект был создан, значит её
+    изменили или удалили после чтения (другой процесс или другой объект той же
+    записи) — сохранение затёрло бы чужую правку.
+    stored(record_id) возвращает текущую запись по ключу. Объекты, созданные
+    вручную (форма добавления), не проверяются и хранилище не читают.
+    """
+    origin = record_origins.get(obj)
+    if origin is None:
+        return
+    record_id = origin.get(key)
+    if stored(record_id) != origin:
+        raise ConcurrentModificationError(record_id)
+
+
+def remember(obj, record: dict) -> None:
+    # После успешного сохранения объект соответствует новой записи на диске.
+    # record — снимок (BaseRepository._snapshot): общий с объектом список изменился бы
+    # вместе с объектом, и следующее сохранение приняло бы свою же правку за чужую
+    record_origins[obj] = record
+    if hasattr(obj, "mark_clean"):
+        obj.mark_clean()
+
+
+def is_clean(obj) -> bool:
+    # Объект прочитан или сохранён через репозиторий, и с тех пор его полям ничего не присваивали
+    return obj in record_origins and hasattr(obj, "has_changes") and not obj.has_changes()
+
+
+def is_stored(record: dict, stored: Optional[dict]) -> bool:
+    # В хранилище уже лежит ровно такая запись — например, форму «Обновить» нажали без правок
+    return stored is not None and stored == record
+
+
+@contextmanager
+def locked_all(storages):
+    # Блокировки берутся в одном порядке во всех процессах — иначе возможна взаимоблокировка
+    acquired = []
+    try:
+        for storage in sorted(storages, key=lambda s: s.lock_path):
+            lock = storage.locked()
+            lock.__enter__()
+            acquired.append(lock)
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.__exit__(None, None, None)
@@ -1,69 +1,97 @@
 # repositories/payment_repository.py
-import json
-import os
 from datetime import date
-from typing import List
+from typing import Dict, Iterator, List
 from classes.Payment import Payment
+from repositories.base_repository import BaseRepository
+from repositories.cache import RecordIndex, RepositoryCache, shared_cache
+from repositories.json_codec import JsonCodec
+from repositories.storage import DEFAULT_DB_PATH
+from repositories.views import PaymentView
 
-class PaymentRepository:
-    def __init__(self, filename: str = "data/payments.json"):
-        self.filename = filename
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+class PaymentRepository(BaseRepository[Payment]):
+    TABLE = "payments"
+    KEY = "payment_id"
+    COLUMNS = ("member_id", "plan_id", "payment_date")
+    BINARY_SCHEMA = (
+        ("payment_id", "int"), ("member_id", "int"), ("plan_id", "int"), ("amount", "int"),
+        ("payment_date", "str"),
+    )
+    VIEW = PaymentView
 
-    def _load(self) -> List[dict]:
-        if not os.path.exists(self.filename):
-            return []
-        try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    return []
-                return json.loads(content)
-        except json.JSONDecodeError:
-            return []
-
-    def _save(self,  data: List[dict]) -> None:
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def __init__(self, filename: str = "data/payments.json", cache: RepositoryCache = shared_cache,
+                 engine: str = None, db_path: str = DEFAULT_DB_PATH, codec: str | JsonCodec = None,
+                 partition_by: str = None):
+        # partition_by="year" или "month" раскладывает платежи по файлам data/payments/<период>.json
+        super().__init__(
+            filename, cache, engine, db_path, codec, partition_by=partition_by, partition_field="payment_date",
+        )
 
-    def save(self, payment: Payment) -> None:
-        data = self._load()
-        payment_dict = {
+    @staticmethod
+    def _to_record(payment: Payment) -> dict:
+        return {
             "payment_id": payment.payment_id,
             "member_id": payment.member_id,
             "plan_id": payment.plan_id,
             "amount": payment.amount,
             "payment_date": payment.payment_date.isoformat(),
         }
-        data.append(payment_dict)  # Платежи обычно не обновляют, только добавляют
-        self._save(data)
 
-    def find_all(self) -> List[Payment]:
-        data = self._load()
-        payments = []
-        for item in data:
-            try:
-                payment = Payment(
-                    payment_id=item["payment_id"],
-                    member_id=item["member_id"],
-                    plan_id=item["plan_id"],
-                    amount=item["amount"],
-                    payment_date=date.fromisoformat(item["payment_date"]),
-                )
-                payments.append(payment)
-            except (KeyError, ValueError) as e:
-                print(f"Неправильный платёж {e}")
-                continue
-        return payments
+    @staticmethod
+    def _to_object(item: dict) -> Payment | None:
+        try:
+            return Payment(
+                payment_id=item["payment_id"],
+                member_id=item["member_id"],
+                plan_id=item["plan_id"],
+                amount=item["amount"],
+                payment_date=date.fromisoformat(item["payment_date"]),
+            )
+        except (KeyError, ValueError) as e:
+            print(f"Неправильный платёж {e}")
+            return None
+
+    def _write(self, record: dict) -> None:
+        # Платежи обычно не обновляют, только добавляют; правка существующего — обычным сохранением,
+        # иначе в файле остались бы две записи с одним ID
+        if self._stored(record["payment_id"]) is None:
+            self.storage.append(record, self._index)
+        else:
+            super()._write(record)
+
+    def iter_by_member_id(self, member_id: int) -> Iterator[Payment]:
+        return self.iter_where(lambda p: p.member_id == member_id)
 
     def find_by_member_id(self, member_id: int) -> List[Payment]:
-        return [p for p in self.find_all() if p.member_id == member_id]
+        return self._find_by("member_id", member_id)
 
-    def delete(self, payment_id: int) -> bool:
-        data = self._load()
-        for i, item in enumerate(data):
-            if item["payment_id"] == payment_id:
-                del data[i]
-                self._save(data)
-                return True
-        return False
\ No newline at end of file
+    def find_by_plan_id(self, plan_id: int) -> List[Payment]:
+        return self._find_by("plan_id", plan_id)
+
+    def _partition_index(self, name: str) -> RecordIndex:
+        part = self.storage.partition(name)
+        return self.cache.get(
+            part.cache_key, part.signature(),
+            lambda: RecordIndex(part.load(), "payment_id", self._to_object, self.cache.objects, part.cache_key),
+        )
+
+    def find_between(self, start: date, end: date) -> List[Payment]:
+        # Даты хранятся в ISO-формате, поэтому строки сортируются как даты; границы включительно
+        low, high = start.isoformat(), end.isoformat()
+        if not hasattr(self.storage, "partitions_between"):
+            # SQLite выбирает диапазон по индексу колонки payment_date, остальные — по индексу в памяти
+            return self._between("payment_date", low, high)
+        # Если вся история уже в кэше — берём оттуда, иначе читаем только разделы из диапазона
+        index = self.cache.peek(self.storage.cache_key, self.storage.signature())
+        if index is not None:
+            return index.between("payment_date", low, high)
+        payments = []
+        for name in self.storage.partitions_between(low, high):
+            payments.extend(self._partition_index(name).between("payment_date", low, high))
+        return payments
+
+    def revenue_by_plan(self) -> Dict[int, int]:
+        index = self._index()
+        return {
+            plan_id: sum(p.amount for p in index.find_by("plan_id", plan_id))
+            for plan_id in index.values("plan_id")
+        }
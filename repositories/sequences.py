@@ -0,0 +1,71 @@
+# repositories/sequences.py
+import os
+import threading
+from typing import Any, Callable, Optional
+
+from repositories.cache import RecordIndex
+from repositories.locking import read_version, sidecar
+from repositories.storage import atomic_write
+
+DEFAULT_BLOCK_SIZE = 20
+
+
+class IdSequence:
+    """Постоянная монотонная последовательность ID одной сущности.
+
+    Последний выданный ID хранится рядом с данными (members.json.seq,
+    gym.db.members.seq) и меняется под блокировкой хранилища, поэтому
+    рабочие места общего каталога никогда не получат один и тот же ID.
+    Процесс забирает сразу блок из block_size значений и раздаёт его из
+    памяти: файл трогается раз в block_size вызовов. Неиспользованный
+    остаток блока при выходе пропадает — ID растут, но не обязательно подряд.
+    """
+
+    def __init__(self, storage, stored: Callable[[Any], Optional[dict]], current: Callable[[], RecordIndex],
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        # stored(record_id) — запись по ключу (BaseRepository._stored): проверка занятости ID
+        # не загружает индекс; current нужен только при первом запуске, без файла *.seq
+        self.storage = storage
+        self.stored = stored
+        self.current = current
+        self.block_size = block_size
+        self.path = sidecar(storage.cache_key, ".seq")
+        self._next = 0
+        self._limit = 0  # блок исчерпан, когда _next == _limit
+        self._guard = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._guard:
+            # ID, заданный явно (форма, импорт, payment_id=), мог уже занять значение из блока
+            while True:
+                if self._next >= self._limit:
+                    self._reserve()
+                value = self._next
+                self._next += 1
+                if self.stored(value) is None:
+                    return value
+
+    def _reserve(self) -> None:
+        with self.storage.locked():
+            last = self._read_last()
+            if last is None:
+                # Первый запуск: продолжаем с наибольшего ID в данных — один раз, дальше только файл
+                last = max((i for i in self.current().positions if isinstance(i, int)), default=0)
+            limit = last + self.block_size
+            self._write_last(limit)
+        self._next, self._limit = last + 1, limit + 1
+
+    # Хранилище в памяти держит счётчик у себя (атрибут sequence), остальные — в файле *.seq
+
+    def _read_last(self) -> Optional[int]:
+        if hasattr(self.storage, "sequence"):
+            return self.storage.sequence
+        if os.path.exists(self.path):
+            return read_version(self.path)
+        return None
+
+    def _write_last(self, value: int) -> None:
+        if hasattr(self.storage, "sequence"):
+            self.storage.sequence = value
+        else:
+            atomic_write(self.path, lambda f: f.write(str(value)))
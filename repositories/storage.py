@@ -0,0 +1,1371 @@
+# repositories/storage.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Sequence, Union
+
+from repositories.binary_format import Schema, decode_records, encode_records
+from repositories.cache import RecordIndex, file_signature
+from repositories.json_codec import JsonCodec, get_codec
+from repositories.locking import FileLock, after_unlock, read_version, sidecar
+
+# Движок по умолчанию можно выбрать без правки кода: GYM_STORAGE_ENGINE=sqlite
+DEFAULT_ENGINE = os.environ.get("GYM_STORAGE_ENGINE", "json")
+DEFAULT_DB_PATH = "data/gym.db"
+# Окно группового коммита в миллисекундах; 0 — каждая запись сразу на диск
+DEFAULT_GROUP_COMMIT_MS = int(os.environ.get("GYM_GROUP_COMMIT_MS", "0"))
+
+# Итог пакетного сохранения для каждой записи
+INSERTED = "inserted"
+UPDATED = "updated"
+
+
+def _fsync_dir(directory: str) -> None:
+    # Фиксируем сам rename; на Windows каталог так открыть нельзя — пропускаем
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _umask() -> int:
+    # Узнать umask можно, только установив новую, — сразу возвращаем прежнюю
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _umask()
+
+
+def _file_mode(filename: str) -> int:
+    # Права заменяемого файла; для нового — как у open(): 0o666 с учётом umask
+    try:
+        return os.stat(filename).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(filename: str, write: Callable[[IO], None], binary: bool = False) -> None:
+    """Пишет файл через временный файл, fsync и rename.
+
+    При сбое на любом шаге на диске остаётся либо старая, либо новая версия
+    файла целиком, но не обрезанная. Права файла сохраняются: mkstemp
+    создаёт временный файл только для владельца.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=directory)
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, _file_mode(filename))
+        os.replace(tmp_name, filename)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    _fsync_dir(directory)
+
+
+class GroupCommit:
+    """Групповой коммит: один fsync на все дозаписи файла, пришедшие в течение окна.
+
+    Данные пишутся в файл сразу, под блокировкой хранилища, поэтому другие
+    процессы видят их, а версия хранилища растёт уже после записи. Откладывается
+    только fsync: первый поток, которому он нужен, становится ведущим — ждёт окно
+    и синхронизирует файл за всех, кто дописал его за это время; остальные ждут
+    его. Ожидание идёт после снятия блокировок (after_unlock), и сохранение
+    возвращается только тогда, когда его запись уже на диске.
+    """
+
+    def __init__(self, filename: str, window_ms: int):
+        self.filename = filename
+        self.window = window_ms / 1000
+        self._cond = threading.Condition()
+        self._written = 0  # номер последней дозаписи
+        self._synced = 0  # номер последней дозаписи, которую уже покрыл fsync
+        self._syncing = False
+
+    def written(self) -> None:
+        # Вызывается сразу после дозаписи без fsync; дожидаемся его, отпустив блокировки
+        with self._cond:
+            self._written += 1
+            ticket = self._written
+        after_unlock(lambda: self.wait(ticket))
+
+    def wait(self, ticket: int) -> None:
+        while True:
+            with self._cond:
+                while self._syncing and self._synced < ticket:
+                    self._cond.wait()
+                if self._synced >= ticket:
+                    return
+                self._syncing = True
+            try:
+                time.sleep(self.window)
+                self.flush()
+            finally:
+                with self._cond:
+                    self._syncing = False
+                    self._cond.notify_all()
+
+    def flush(self) -> None:
+        # fsync всего, что уже дописано, без ожидания окна
+        with self._cond:
+            target = self._written
+        try:
+            fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND)
+        except FileNotFoundError:
+            fd = None  # файл удалён при сжатии: его записи уже в переписанном файле
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        with self._cond:
+            self._synced = max(self._synced, target)
+            self._cond.notify_all()
+
+
+# Один групповой коммит на файл: все экземпляры хранилища над файлом ждут общего fsync
+_group_commits: Dict[str, GroupCommit] = {}
+
+
+def _group_commit_for(filename: str, window_ms: int) -> Optional[GroupCommit]:
+    if window_ms <= 0:
+        return None
+    path = os.path.abspath(filename)
+    if path not in _group_commits:
+        _group_commits[path] = GroupCommit(path, window_ms)
+    return _group_commits[path]
+
+
+def flush_all() -> None:
+    """Сразу синхронизирует с диском всё, что дописано под групповым коммитом."""
+    for group_commit in list(_group_commits.values()):
+        group_commit.flush()
+
+
+def _cut_torn_tail(filename: str) -> None:
+    # Сбой посреди дозаписи оставляет в конце файла строку без \n. Читатели её пропускают,
+    # но следующая дозапись склеилась бы с ней («1» и «5\n» дали бы «15»), поэтому под
+    # блокировкой хранилища перед дозаписью обрывок отрезается
+    try:
+        f = open(filename, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        if position == 0:
+            return
+        f.seek(position - 1)
+        if f.read(1) == b"\n":
+            return
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        f.truncate(position)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Фоновые сжатия по файлам: одно на файл одновременно
+_compactions: Dict[str, threading.Thread] = {}
+_compactions_guard = threading.Lock()
+
+
+def compact_in_background(storage) -> None:
+    """Запускает storage.compact() в фоновом потоке под блокировкой хранилища.
+
+    Чтение не ждёт сжатия: до его конца отметки об удалении учитываются
+    при загрузке, а после файл просто становится короче.
+    """
+    key = storage.cache_key
+    with _compactions_guard:
+        running = _compactions.get(key)
+        if running is not None and running.is_alive():
+            return
+
+        def run():
+            try:
+                with FileLock(storage.lock_path):
+                    storage.compact()
+            except (IOError, OSError) as e:
+                print(f"Ошибка сжатия {os.path.basename(key)}: {e}")
+
+        thread = threading.Thread(target=run, daemon=True)
+        _compactions[key] = thread
+        thread.start()
+
+
+def wait_for_compactions() -> None:
+    """Дожидается запущенных фоновых сжатий (перед выходом, в проверках)."""
+    with _compactions_guard:
+        threads = list(_compactions.values())
+    for thread in threads:
+        thread.join()
+
+
+def _full_load_error(f: IO) -> json.JSONDecodeError:
+    # Ошибка разбора того же вида и с той же позицией, что дала бы загрузка файла целиком:
+    # файл перечитывается только на этом, ошибочном, пути
+    f.seek(0)
+    try:
+        json.load(f)
+    except json.JSONDecodeError as e:
+        return e
+    # Файл — корректный JSON, но не массив
+    return json.JSONDecodeError("Ожидался JSON-массив", "", 0)
+
+
+def iter_json_array(f: IO, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """Разбирает JSON-массив из файла по одному элементу, читая его кусками.
+
+    В памяти одновременно только текущий кусок и текущий элемент, а не весь файл.
+    Массив, который json.load не принял бы ([1 2], [1,,2], [1,], данные после ]),
+    вызывает ту же json.JSONDecodeError, что и загрузка целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    # Что ожидается дальше: "[" — начало массива, "first" — элемент или "]",
+    # "value" — элемент после запятой, "separator" — "," или "]", "end" — только пробелы
+    expect = "["
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if expect == "[":
+                if char != "[":
+                    raise _full_load_error(f)
+                expect = "first"
+                position += 1
+                continue
+            if expect == "end":
+                raise _full_load_error(f)
+            if expect == "separator":
+                if char == ",":
+                    expect = "value"
+                    position += 1
+                    continue
+                if char != "]":
+                    raise _full_load_error(f)
+                expect = "end"
+                position += 1
+                continue
+            if char == "]" and expect == "first":
+                expect = "end"
+                position += 1
+                continue
+            if char in ",]":
+                raise _full_load_error(f)
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise _full_load_error(f)
+            else:
+                # Элемент мог оборваться ровно на границе куска (например, число) — дочитываем
+                if end < len(buffer) or eof:
+                    yield item
+                    expect = "separator"
+                    position = end
+                    continue
+        elif eof:
+            # Пустой файл — пустой список, как и у load; оборванный массив — ошибка
+            if expect not in ("[", "end"):
+                raise _full_load_error(f)
+            return
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+class JsonFileStorage:
+    """Записи хранятся одним JSON-массивом в файле.
+
+    Удаление не переписывает файл: ID дописывается в файл отметок
+    (members.json.tombstones), и при чтении такие записи пропускаются.
+    Когда отметок набирается заметная доля от живых записей, файл
+    переписывается без них в фоне (compact_in_background).
+    """
+
+    def __init__(self, filename: str, key: str, group_commit_ms: int = 0, lock_path: str = None,
+                 compact_ratio: float = 0.2, compact_min_tombstones: int = 50, codec: JsonCodec = None):
+        self.filename = filename
+        self.key = key
+        self.codec = get_codec(codec)
+        self.tombstones_path = filename + ".tombstones"
+        # Сжатие берёт ту же блокировку, что и запись через VersionedStorage
+        self.lock_path = lock_path or sidecar(self.cache_key, ".lock")
+        self.compact_ratio = compact_ratio
+        self.compact_min_tombstones = compact_min_tombstones
+        # Число отметок и подписи файлов, для которых оно посчитано, — чтобы не перечитывать отметки
+        self._dead: Optional[tuple] = None
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Снимок переписывается через atomic_write, где fsync нужен до rename; групповой
+        # коммит объединяет только fsync дозаписей в файл отметок
+        self.group_commit = _group_commit_for(self.tombstones_path, group_commit_ms)
+
+    @property
+    def cache_key(self) -> str:
+        return os.path.abspath(self.filename)
+
+    def signature(self):
+        return file_signature(self.filename), file_signature(self.tombstones_path)
+
+    def _read_file(self) -> List[dict]:
+        with open(self.filename, "rb") as f:
+            content = f.read().strip()
+            if not content:
+                return []
+            return self.codec.loads(content)
+
+    def load(self) -> List[dict]:
+        if not os.path.exists(self.filename):
+            return []
+        try:
+            records = self._read_file()
+        except (ValueError, IOError) as e:
+            print(f"Ошибка чтения {os.path.basename(self.filename)}: {e}")
+            return []
+        deleted = self._tombstones()
+        if deleted:
+            records = [record for record in records if record.get(self.key) not in deleted]
+        return records
+
+    def iter_records(self) -> Iterator[dict]:
+        if not os.path.exists(self.filename):
+            return
+        deleted = self._tombstones()
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                for record in iter_json_array(f):
+                    if record.get(self.key) not in deleted:
+                        yield record
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Ошибка чтения {os.path.basename(self.filename)}: {e}")
+
+    def _tombstones(self) -> set:
+        # Первая строка — подпись файла данных, к которому относятся отметки. Если файл
+        # с тех пор переписан (сжатие, сохранение), старые отметки уже учтены в нём
+        if not os.path.exists(self.tombstones_path):
+            return set()
+        deleted = set()
+        try:
+            with open(self.tombstones_path, "r", encoding="utf-8") as f:
+                header = f.readline()
+                if not header or json.loads(header).get("base") != list(file_signature(self.filename) or ()):
+                    return set()
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # недописанная строка (см. _cut_torn_tail) — удаление не состоялось
+                    try:
+                        deleted.add(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass
+        except (ValueError, IOError) as e:
+            print(f"Ошибка чтения {os.path.basename(self.tombstones_path)}: {e}")
+            return set()
+        return deleted
+
+    def _tombstone_files(self) -> tuple:
+        return file_signature(self.filename), file_signature(self.tombstones_path)
+
+    def _tombstone_count(self) -> int:
+        files = self._tombstone_files()
+        if self._dead is None or self._dead[0] != files:
+            self._dead = (files, len(self._tombstones()))
+        return self._dead[1]
+
+    def _add_tombstones(self, record_ids: List, live: int) -> None:
+        # live — сколько записей останется после удаления; от него считается доля отметок
+        lines = "".join(json.dumps(record_id) + "\n" for record_id in record_ids)
+        _cut_torn_tail(self.tombstones_path)
+        dead = self._tombstone_count()
+        if dead:
+            with open(self.tombstones_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                if self.group_commit is None:
+                    os.fsync(f.fileno())
+            if self.group_commit is not None:
+                self.group_commit.written()
+        else:
+            header = json.dumps({"base": list(file_signature(self.filename) or ())}) + "\n"
+            atomic_write(self.tombstones_path, lambda f: f.write(header + lines))
+        dead += len(record_ids)
+        self._dead = (self._tombstone_files(), dead)
+        if dead >= self.compact_min_tombstones and dead > self.compact_ratio * live:
+            compact_in_background(self)
+
+    def _drop_tombstones(self) -> None:
+        # Файл данных только что переписан из актуальных записей — отметки больше не нужны
+        if os.path.exists(self.tombstones_path):
+            os.remove(self.tombstones_path)
+
+    def compact(self) -> None:
+        # Вызывается под блокировкой хранилища: чужая запись между чтением и перезаписью невозможна
+        if self._tombstones():
+            self._write_snapshot(self.load())
+
+    def _write_snapshot(self, records: List[dict]) -> None:
+        self._write_file(records)
+        self._drop_tombstones()
+
+    def _write_file(self, records: List[dict]) -> None:
+        data = self.codec.dumpb(records)
+        atomic_write(self.filename, lambda f: f.write(data), binary=True)
+
+    def write_all(self, records: List[dict]) -> None:
+        self._write_snapshot(records)
+
+    def flush(self) -> None:
+        if self.group_commit is not None:
+            self.group_commit.flush()
+
+    def upsert(self, record: dict, current: Callable[[], RecordIndex]) -> None:
+        index = current()
+        data = list(index.records)
+        position = index.positions.get(record[self.key])
+        if position is not None:
+            data[position] = record
+        else:
+            data.append(record)
+        self.write_all(data)
+
+    def append(self, record: dict, current: Callable[[], RecordIndex]) -> None:
+        self.write_all(list(current().records) + [record])
+
+    def delete(self, record_id, current: Callable[[], RecordIndex]) -> bool:
+        return self.delete_many([record_id], current)[record_id]
+
+    def upsert_many(self, records: List[dict], current: Callable[[], RecordIndex]) -> Dict:
+        index = current()
+        data = list(index.records)
+        positions = dict(index.positions)
+        outcomes = {}
+        for record in records:
+            record_id = record[self.key]
+            position = positions.get(record_id)
+            if position is not None:
+                data[position] = record
+                outcomes[record_id] = UPDATED
+            else:
+                positions[record_id] = len(data)
+                data.append(record)
+                outcomes[record_id] = INSERTED
+        self.write_all(data)
+        return outcomes
+
+    def _delete_ids(self, record_ids: List, index: RecordIndex) -> None:
+        # record_ids — только ID, которые есть в index
+        if not record_ids:
+            return
+        self._add_tombstones(record_ids, len(index) - len(record_ids))
+
+    def delete_many(self, record_ids, current: Callable[[], RecordIndex]) -> Dict:
+        index = current()
+        outcomes = {record_id: record_id in index for record_id in record_ids}
+        self._delete_ids([record_id for record_id, found in outcomes.items() if found], index)
+        return outcomes
+
+    def apply(self, records: List[dict], record_ids, current: Callable[[], RecordIndex]) -> None:
+        # Сохранения и удаления одной транзакции — одна перезапись файла
+        index = current()
+        if not records:
+            self._delete_ids(list(dict.fromkeys(record_id for record_id in record_ids if record_id in index)), index)
+            return
+        data = list(index.records)
+        positions = dict(index.positions)
+        for record in records:
+            position = positions.get(record[self.key])
+            if position is not None:
+                data[position] = record
+            else:
+                positions[record[self.key]] = len(data)
+                data.append(record)
+        dropped = {positions[record_id] for record_id in record_ids if record_id in positions}
+        self.write_all([record for i, record in enumerate(data) if i not in dropped])
+
+
+class BinarySnapshotStorage(JsonFileStorage):
+    """Записи хранятся компактным бинарным снимком (см. binary_format).
+
+    Запись устроена как у JSON-файла — снимок переписывается целиком, — но
+    читается в разы быстрее и занимает меньше места. Поля и типы задаёт схема
+    репозитория; без схемы записи лежат в снимке как JSON.
+    """
+
+    def __init__(self, filename: str, key: str, schema: Schema = (), group_commit_ms: int = 0,
+                 lock_path: str = None):
+        super().__init__(filename, key, group_commit_ms=group_commit_ms, lock_path=lock_path)
+        self.schema = schema
+
+    def _read_file(self) -> List[dict]:
+        with open(self.filename, "rb") as f:
+            return decode_records(f.read())
+
+    def iter_records(self) -> Iterator[dict]:
+        # Снимок хранится по колонкам, поэтому читается только целиком
+        yield from self.load()
+
+    def _write_file(self, records: List[dict]) -> None:
+        data = encode_records(records, self.schema)
+        atomic_write(self.filename, lambda f: f.write(data), binary=True)
+
+
+def json_to_binary(json_filename: str, binary_filename: str, key: str, schema: Schema = ()) -> int:
+    """Переводит JSON-файл репозитория в бинарный снимок; возвращает число записей."""
+    records = JsonFileStorage(json_filename, key).load()
+    BinarySnapshotStorage(binary_filename, key, schema).write_all(records)
+    return len(records)
+
+
+def binary_to_json(binary_filename: str, json_filename: str, key: str) -> int:
+    """Обратное преобразование: снимок в JSON-файл того же вида, что пишут репозитории."""
+    records = BinarySnapshotStorage(binary_filename, key).load()
+    JsonFileStorage(json_filename, key).write_all(records)
+    return len(records)
+
+
+# Сколько в журнале строк и живых записей: (подпись файла, строк, записей) по пути.
+# Общий для всех экземпляров хранилища над файлом: считает тот, кто прочитал журнал,
+# а дальше счёт ведут дозаписи, пока подпись файла совпадает
+_journal_counts: Dict[str, tuple] = {}
+
+
+class JsonlJournalStorage:
+    """Журнал JSON Lines: каждое сохранение дописывает в конец файла одну строку.
+
+    Строка — либо запись целиком, либо отметка об удалении. При чтении журнал
+    проигрывается построчно; более поздняя строка с тем же ключом замещает
+    раннюю. Когда устаревших строк становится больше живых, журнал сжимается
+    в фоне — это проверяется и при чтении, и при каждой дозаписи, поэтому
+    журнал не растёт и в долго работающей программе, которая его не перечитывает.
+    """
+
+    DELETED = "__deleted__"
+    PATCH = "__patch__"  # строка {"__patch__": ID, "fields": {...}} меняет только эти поля
+
+    def __init__(self, filename: str, key: str, compact_ratio: float = 1.0, compact_min_lines: int = 1000,
+                 group_commit_ms: int = 0, lock_path: str = None, codec: JsonCodec = None):
+        self.filename = filename
+        self.key = key
+        self.codec = get_codec(codec).single_line()
+        self.lock_path = lock_path or sidecar(self.cache_key, ".lock")
+        self.compact_ratio = compact_ratio
+        self.compact_min_lines = compact_min_lines
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.group_commit = _group_commit_for(filename, group_commit_ms)
+
+    @property
+    def cache_key(self) -> str:
+        return os.path.abspath(self.filename)
+
+    def signature(self):
+        return file_signature(self.filename)
+
+    def _file_entries(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, "rb") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.endswith(b"\n"):
+                    break  # последняя строка не дописана: запись прервана или ещё идёт (см. _cut_torn_tail)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield self.codec.loads(line)
+                except ValueError as e:
+                    print(f"Ошибка чтения {os.path.basename(self.filename)}, строка {line_no}: {e}")
+
+    def load(self) -> List[dict]:
+        # Подпись до чтения: если журнал дописали во время чтения, счёт строк просто не примут
+        signature = file_signature(self.filename)
+        records: Dict = {}
+        lines = 0
+        for entry in self._file_entries():
+            lines += 1
+            if self.DELETED in entry:
+                records.pop(entry[self.DELETED], None)
+            elif self.PATCH in entry:
+                record = records.get(entry[self.PATCH])
+                if record is not None:
+                    records[entry[self.PATCH]] = {**record, **entry["fields"]}
+            else:
+                # Обновлённая запись остаётся на месте первой версии, как в JSON-файле
+                records[entry.get(self.key)] = entry
+        _journal_counts[self.cache_key] = (signature, lines, len(records))
+        if self._needs_compaction(lines, len(records)):
+            # Чтение идёт без блокировки, поэтому переписываем журнал не здесь, а под ней в фоне
+            compact_in_background(self)
+        return list(records.values())
+
+    def _needs_compaction(self, lines: int, live: int) -> bool:
+        return lines - live > max(self.compact_min_lines, self.compact_ratio * live)
+
+    def iter_records(self) -> Iterator[dict]:
+        # Первый проход запоминает для каждой записи строку её полной версии и
+        # последнего патча, второй собирает запись с этих строк — в памяти ключи
+        # и только те записи, к которым ещё не применены все патчи
+        spans: Dict = {}  # ID -> [строка полной версии, последняя строка]
+        for line_no, entry in enumerate(self._file_entries()):
+            if self.DELETED in entry:
+                spans.pop(entry[self.DELETED], None)
+            elif self.PATCH in entry:
+                if entry[self.PATCH] in spans:
+                    spans[entry[self.PATCH]][1] = line_no
+            else:
+                spans[entry.get(self.key)] = [line_no, line_no]
+        starts = {start: record_id for record_id, (start, _) in spans.items()}
+        ends = {end: record_id for record_id, (_, end) in spans.items()}
+        del spans
+        building: Dict = {}
+        for line_no, entry in enumerate(self._file_entries()):
+            if line_no in starts:
+                building[starts[line_no]] = entry
+            elif self.PATCH in entry and entry[self.PATCH] in building:
+                building[entry[self.PATCH]] = {**building[entry[self.PATCH]], **entry["fields"]}
+            if line_no in ends:
+                yield building.pop(ends[line_no])
+
+    def _dump_line(self, entry: dict) -> str:
+        return self.codec.dumps(entry) + "\n"
+
+    def _append_lines(self, entries: List[dict], added: Optional[int]) -> None:
+        # added — на сколько дозапись меняет число живых записей; None — неизвестно
+        if not entries:
+            return
+        _cut_torn_tail(self.filename)
+        before = file_signature(self.filename)
+        with open(self.filename, "a", encoding="utf-8") as f:
+            f.writelines(self._dump_line(entry) for entry in entries)
+            f.flush()
+            if self.group_commit is None:
+                os.fsync(f.fileno())
+        if self.group_commit is not None:
+            self.group_commit.written()
+        counts = _journal_counts.pop(self.cache_key, None)
+        if counts is None or counts[0] != before or added is None:
+            return  # журнал менял кто-то ещё — посчитает следующее чтение
+        lines, live = counts[1] + len(entries), counts[2] + added
+        _journal_counts[self.cache_key] = (file_signature(self.filename), lines, live)
+        if self._needs_compaction(lines, live):
+            compact_in_background(self)
+
+    def _rewrite(self, records: List[dict]) -> None:
+        atomic_write(self.filename, lambda f: f.writelines(self._dump_line(record) for record in records))
+        _journal_counts[self.cache_key] = (file_signature(self.filename), len(records), len(records))
+
+    def compact(self) -> None:
+        # Вызывается под блокировкой хранилища, как и дозапись: строка между чтением и перезаписью не пропадёт
+        self._rewrite(self.load())
+
+    def flush(self) -> None:
+        if self.group_commit is not None:
+            self.group_commit.flush()
+
+    def write_all(self, records: List[dict]) -> None:
+        self._rewrite(records)
+
+    def upsert(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        added = None if current is None else int(record[self.key] not in current())
+        self._append_lines([record], added)
+
+    def append(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        self._append_lines([record], 1)
+
+    def patch(self, record_id, fields: dict, current: Callable[[], RecordIndex] = None) -> None:
+        if fields:
+            self._append_lines([{self.PATCH: record_id, "fields": fields}], 0)
+
+    def delete(self, record_id, current: Callable[[], RecordIndex]) -> bool:
+        # Отметку пишем только для существующей записи, иначе журнал копит мусор
+        if record_id not in current():
+            return False
+        self._append_lines([{self.DELETED: record_id}], -1)
+        return True
+
+    def upsert_many(self, records: List[dict], current: Callable[[], RecordIndex]) -> Dict:
+        index = current()
+        outcomes = {}
+        for record in records:
+            record_id = record[self.key]
+            known = record_id in index or record_id in outcomes
+            outcomes[record_id] = UPDATED if known else INSERTED
+        self._append_lines(records, list(outcomes.values()).count(INSERTED))
+        return outcomes
+
+    def delete_many(self, record_ids, current: Callable[[], RecordIndex]) -> Dict:
+        index = current()
+        outcomes = {record_id: record_id in index for record_id in record_ids}
+        tombstones = [{self.DELETED: record_id} for record_id, found in outcomes.items() if found]
+        self._append_lines(tombstones, -len(tombstones))
+        return outcomes
+
+    def apply(self, records: List[dict], record_ids, current: Callable[[], RecordIndex]) -> None:
+        index = current()
+        added = {record[self.key] for record in records} - set(index.positions)
+        known = set(index.positions) | added
+        tombstones = [{self.DELETED: record_id} for record_id in record_ids if record_id in known]
+        self._append_lines(list(records) + tombstones, len(added) - len(tombstones))
+
+
+# Одно соединение на файл базы: PRAGMA data_version сравнима только
+# в пределах одного соединения
+_connections: Dict[str, sqlite3.Connection] = {}
+# Счётчики собственных записей по таблицам: data_version их не замечает
+_local_versions: Dict[str, int] = {}
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    path = os.path.abspath(db_path)
+    if path not in _connections:
+        _connections[path] = sqlite3.connect(path)
+    return _connections[path]
+
+
+class SqliteStorage:
+    """Записи хранятся в таблице SQLite: ключ, JSON записи и индексируемые поля.
+
+    Сохранение и удаление затрагивают одну строку, а не весь набор данных.
+    """
+
+    def __init__(self, db_path: str, table: str, key: str, columns: Sequence[str] = (), codec: JsonCodec = None):
+        self.db_path = db_path
+        self.table = table
+        self.key = key
+        self.codec = get_codec(codec).single_line()
+        self.columns = tuple(columns)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = _connect(db_path)
+        self.created = self._create_schema()
+
+    def _create_schema(self) -> bool:
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+        ).fetchone()
+        extra = "".join(f", {column}" for column in self.columns)
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(id INTEGER NOT NULL UNIQUE, data TEXT NOT NULL{extra})"
+            )
+            for column in self.columns:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{column} ON {self.table} ({column})"
+                )
+        return exists is None
+
+    @property
+    def cache_key(self) -> str:
+        return f"{os.path.abspath(self.db_path)}#{self.table}"
+
+    def signature(self):
+        # data_version меняется, когда базу изменило другое соединение (другой процесс),
+        # а счётчик — при записи в таблицу из этого процесса
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return data_version, _local_versions.get(self.cache_key, 0)
+
+    def _touch(self) -> None:
+        _local_versions[self.cache_key] = _local_versions.get(self.cache_key, 0) + 1
+
+    def load(self) -> List[dict]:
+        rows = self._conn.execute(f"SELECT data FROM {self.table} ORDER BY rowid")
+        return [self.codec.loads(data) for (data,) in rows]
+
+    def get(self, record_id) -> Optional[dict]:
+        # Одна строка по первичному ключу — без чтения таблицы
+        row = self._conn.execute(f"SELECT data FROM {self.table} WHERE id = ?", (record_id,)).fetchone()
+        return None if row is None else self.codec.loads(row[0])
+
+    def _column(self, name: str) -> str:
+        # Имя поля попадает в текст запроса — допустимы только индексированные колонки
+        if name not in self.columns:
+            raise ValueError(f"Поле {name} не индексируется в таблице {self.table}")
+        return name
+
+    def _select(self, where: List[str], params: list, order: str) -> List[dict]:
+        rows = self._conn.execute(
+            f"SELECT data FROM {self.table} WHERE {' AND '.join(where)} ORDER BY {order}", params
+        )
+        return [self.codec.loads(data) for (data,) in rows]
+
+    def find_by(self, field: str, value) -> List[dict]:
+        # Записи с заданным значением поля — поиском по индексу колонки, в порядке load()
+        return self._select([f"{self._column(field)} = ?"], [value], "rowid")
+
+    def between(self, field: str, low, high, group_field: str = None, group_value=None) -> List[dict]:
+        """Записи, у которых значение поля в [low, high], по возрастанию значения.
+
+        Как RecordIndex.between: None — без границы, записи без значения поля
+        не попадают; group_field сужает выборку до записей с group_value.
+        """
+        column = self._column(field)
+        where, params = [f"{column} IS NOT NULL"], []
+        if low is not None:
+            where.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            where.append(f"{column} <= ?")
+            params.append(high)
+        if group_field is not None:
+            where.append(f"{self._column(group_field)} = ?")
+            params.append(group_value)
+        return self._select(where, params, f"{column}, rowid")
+
+    def iter_records(self) -> Iterator[dict]:
+        # Курсор отдаёт строки по мере чтения, без fetchall
+        cursor = self._conn.execute(f"SELECT data FROM {self.table} ORDER BY rowid")
+        for (data,) in cursor:
+            yield self.codec.loads(data)
+
+    def _row(self, record: dict) -> tuple:
+        return (
+            record[self.key],
+            self.codec.dumps(record),
+            *(record.get(column) for column in self.columns),
+        )
+
+    def _upsert_sql(self) -> str:
+        names = ("id", "data") + self.columns
+        placeholders = ", ".join("?" for _ in names)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+        return (
+            f"INSERT INTO {self.table} ({', '.join(names)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}"
+        )
+
+    def write_all(self, records: List[dict]) -> None:
+        with self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.executemany(self._upsert_sql(), [self._row(record) for record in records])
+        self._touch()
+
+    def upsert(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        with self._conn:
+            self._conn.execute(self._upsert_sql(), self._row(record))
+        self._touch()
+
+    def append(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        self.upsert(record)
+
+    def patch(self, record_id, fields: dict, current: Callable[[], RecordIndex] = None) -> None:
+        # json_set меняет только переданные поля документа; индексированные колонки — вместе с ним
+        if not fields:
+            return
+        paths = ", ".join("?, json(?)" for _ in fields)
+        assignments = [f"data = json_set(data, {paths})"]
+        params = []
+        for name, value in fields.items():
+            params.extend((f'$."{name}"', self.codec.dumps(value)))
+        for column in self.columns:
+            if column in fields:
+                assignments.append(f"{column} = ?")
+                params.append(fields[column])
+        with self._conn:
+            self._conn.execute(
+                f"UPDATE {self.table} SET {', '.join(assignments)} WHERE id = ?", (*params, record_id)
+            )
+        self._touch()
+
+    def delete(self, record_id, current: Callable[[], RecordIndex] = None) -> bool:
+        with self._conn:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (record_id,))
+        self._touch()
+        return cursor.rowcount > 0
+
+    def _existing_ids(self, record_ids: List) -> set:
+        existing = set()
+        # Ограничение SQLite на число параметров в запросе
+        for start in range(0, len(record_ids), 500):
+            chunk = record_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._conn.execute(f"SELECT id FROM {self.table} WHERE id IN ({placeholders})", chunk)
+            existing.update(record_id for (record_id,) in rows)
+        return existing
+
+    def upsert_many(self, records: List[dict], current: Callable[[], RecordIndex] = None) -> Dict:
+        existing = self._existing_ids([record[self.key] for record in records])
+        outcomes = {}
+        for record in records:
+            record_id = record[self.key]
+            outcomes[record_id] = UPDATED if record_id in existing or record_id in outcomes else INSERTED
+        with self._conn:
+            self._conn.executemany(self._upsert_sql(), [self._row(record) for record in records])
+        self._touch()
+        return outcomes
+
+    def delete_many(self, record_ids, current: Callable[[], RecordIndex] = None) -> Dict:
+        outcomes = {}
+        with self._conn:
+            for record_id in record_ids:
+                cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (record_id,))
+                outcomes[record_id] = outcomes.get(record_id, False) or cursor.rowcount > 0
+        self._touch()
+        return outcomes
+
+    def _apply_rows(self, records: List[dict], record_ids) -> None:
+        self._conn.executemany(self._upsert_sql(), [self._row(record) for record in records])
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE id = ?", [(record_id,) for record_id in record_ids])
+
+    def apply(self, records: List[dict], record_ids, current: Callable[[], RecordIndex] = None) -> None:
+        with self._conn:
+            self._apply_rows(records, record_ids)
+        self._touch()
+
+
+def apply_in_transaction(batches) -> bool:
+    """Применяет пакеты (storage, records, record_ids) одной транзакцией SQLite.
+
+    Возвращает False, если хранилища не сидят на одном соединении SQLite, —
+    тогда атомарность обеспечивает вызывающий код.
+    """
+    storages = [getattr(batch[0], "inner", batch[0]) for batch in batches]
+    if not storages or not all(isinstance(storage, SqliteStorage) for storage in storages):
+        return False
+    conn = storages[0]._conn
+    if any(storage._conn is not conn for storage in storages):
+        return False
+    with conn:
+        for storage, (_, records, record_ids) in zip(storages, batches):
+            storage._apply_rows(records, record_ids)
+    for storage in storages:
+        storage._touch()
+    for versioned, *_ in batches:
+        if isinstance(versioned, VersionedStorage):
+            versioned.bump_version()
+    return True
+
+
+class PartitionedStorage:
+    """Записи разложены по файлам-разделам по значению поля даты: год или месяц.
+
+    data/payments.json превращается в каталог data/payments/ с файлами
+    2024.json, 2025.json... Полное чтение склеивает все разделы, а запросы
+    по диапазону дат открывают только те, что в него попадают.
+    """
+
+    UNDATED = "undated"
+    WIDTHS = {"year": 4, "month": 7}  # длина префикса ISO-даты: 2024 / 2024-05
+
+    def __init__(self, directory: str, key: str, field: str, granularity: str,
+                 make_part: Callable[[str], Any], extension: str):
+        if granularity not in self.WIDTHS:
+            raise ValueError(f"Неизвестное разбиение: {granularity}")
+        self.directory = directory
+        self.key = key
+        self.field = field
+        self.width = self.WIDTHS[granularity]
+        self.extension = extension
+        self._make_part = make_part
+        self._parts: Dict[str, Any] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _name_for(self, record: dict) -> str:
+        value = record.get(self.field)
+        return str(value)[:self.width] if value else self.UNDATED
+
+    def partition(self, name: str):
+        if name not in self._parts:
+            self._parts[name] = self._make_part(os.path.join(self.directory, name + self.extension))
+        return self._parts[name]
+
+    def partition_names(self) -> List[str]:
+        names = set(self._parts)
+        for entry in os.listdir(self.directory):
+            name, extension = os.path.splitext(entry)
+            if extension == self.extension:
+                names.add(name)
+        return sorted(names)
+
+    def partitions_between(self, low: str = None, high: str = None) -> List[str]:
+        # Разделы без даты в диапазон не попадают; границы сравниваются по префиксу раздела
+        return [
+            name for name in self.partition_names()
+            if name != self.UNDATED
+            and (low is None or name >= low[:self.width])
+            and (high is None or name <= high[:self.width])
+        ]
+
+    @property
+    def cache_key(self) -> str:
+        return os.path.abspath(self.directory)
+
+    def signature(self):
+        return tuple((name, self.partition(name).signature()) for name in self.partition_names())
+
+    def load(self) -> List[dict]:
+        records = []
+        for name in self.partition_names():
+            records.extend(self.partition(name).load())
+        return records
+
+    def iter_records(self) -> Iterator[dict]:
+        for name in self.partition_names():
+            yield from self.partition(name).iter_records()
+
+    def _current(self, name: str) -> Callable[[], RecordIndex]:
+        # Операциям раздела нужен его собственный индекс; объекты здесь не создаются
+        part = self.partition(name)
+        return lambda: RecordIndex(part.load(), self.key, lambda record: record)
+
+    def _locate(self, record_id, index: RecordIndex) -> Optional[str]:
+        position = index.positions.get(record_id)
+        return None if position is None else self._name_for(index.records[position])
+
+    def write_all(self, records: List[dict]) -> None:
+        groups: Dict[str, List[dict]] = {name: [] for name in self.partition_names()}
+        for record in records:
+            groups.setdefault(self._name_for(record), []).append(record)
+        for name, part_records in groups.items():
+            self.partition(name).write_all(part_records)
+
+    def apply(self, records: List[dict], record_ids, current: Callable[[], RecordIndex]) -> None:
+        index = current()
+        saves: Dict[str, List[dict]] = {}
+        deletes: Dict[str, List] = {}
+        for record in records:
+            name = self._name_for(record)
+            saves.setdefault(name, []).append(record)
+            # Дата сменилась — запись переезжает в другой раздел
+            old_name = self._locate(record[self.key], index)
+            if old_name is not None and old_name != name:
+                deletes.setdefault(old_name, []).append(record[self.key])
+        for record_id in record_ids:
+            name = self._locate(record_id, index)
+            if name is not None:
+                deletes.setdefault(name, []).append(record_id)
+        for name in sorted(set(saves) | set(deletes)):
+            self.partition(name).apply(saves.get(name, []), deletes.get(name, []), self._current(name))
+
+    def upsert(self, record: dict, current: Callable[[], RecordIndex]) -> None:
+        self.apply([record], [], current)
+
+    def append(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        name = self._name_for(record)
+        self.partition(name).append(record, self._current(name))
+
+    def delete(self, record_id, current: Callable[[], RecordIndex]) -> bool:
+        return self.delete_many([record_id], current)[record_id]
+
+    def upsert_many(self, records: List[dict], current: Callable[[], RecordIndex]) -> Dict:
+        index = current()
+        outcomes = {}
+        for record in records:
+            record_id = record[self.key]
+            outcomes[record_id] = UPDATED if record_id in index or record_id in outcomes else INSERTED
+        self.apply(records, [], lambda: index)
+        return outcomes
+
+    def delete_many(self, record_ids, current: Callable[[], RecordIndex]) -> Dict:
+        index = current()
+        outcomes = {record_id: record_id in index for record_id in record_ids}
+        self.apply([], [record_id for record_id, found in outcomes.items() if found], lambda: index)
+        return outcomes
+
+    def flush(self) -> None:
+        for part in self._parts.values():
+            if hasattr(part, "flush"):
+                part.flush()
+
+
+def field_patch(record: dict, current: Optional[dict]) -> Optional[dict]:
+    """Поля записи, которые отличаются от сохранённой версии current.
+
+    None — записи ещё нет или из неё пропало поле: патчем это не выразить,
+    нужна запись целиком.
+    """
+    if current is None:
+        return None
+    if any(name not in record for name in current):
+        return None
+    return {name: value for name, value in record.items() if name not in current or current[name] != value}
+
+
+def save_record(storage, record: dict, current: Callable[[], RecordIndex],
+                stored: Callable[[Any], Optional[dict]]) -> None:
+    # Журнал и SQLite умеют менять отдельные поля; JSON-файл и снимок переписываются целиком.
+    # Сохранённую версию даёт stored(record_id) — одна запись, а не весь индекс
+    if hasattr(storage, "patch"):
+        patch = field_patch(record, stored(record[storage.key]))
+        if patch is not None:
+            storage.patch(record[storage.key], patch, current)
+            return
+    storage.upsert(record, current)
+
+
+class VersionedStorage:
+    """Обёртка хранилища для общего каталога данных на нескольких рабочих местах.
+
+    Каждое изменение идёт под блокировкой файла и увеличивает версию
+    хранилища в файле *.version. Версия входит в подпись, поэтому кэш
+    любого процесса замечает чужую запись. Чтение не блокируется.
+    """
+
+    MUTATIONS = ("write_all", "upsert", "append", "delete", "upsert_many", "delete_many", "apply", "patch")
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.lock_path = sidecar(inner.cache_key, ".lock")
+        self.version_path = sidecar(inner.cache_key, ".version")
+
+    @property
+    def cache_key(self) -> str:
+        return self.inner.cache_key
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.inner, name)
+        if name not in self.MUTATIONS:
+            return attr
+
+        def locked_mutation(*args, **kwargs):
+            with self.locked():
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self.bump_version()
+        return locked_mutation
+
+    def version(self) -> int:
+        return read_version(self.version_path)
+
+    def signature(self):
+        return self.version(), self.inner.signature()
+
+    def locked(self) -> FileLock:
+        return FileLock(self.lock_path)
+
+    def bump_version(self) -> None:
+        with self.locked():
+            version = self.version() + 1
+            atomic_write(self.version_path, lambda f: f.write(str(version)))
+
+
+class InMemoryStorage:
+    """Записи хранятся только в памяти процесса — без файлов и без диска.
+
+    Для проверок и замеров: показывает цену самого репозитория без
+    ввода-вывода. Хранилища общие по имени файла, как и файловые: два
+    репозитория над data/members.json видят одни и те же записи. Подпись —
+    счётчик изменений, блокировка — блокировка потоков этого процесса.
+    """
+
+    def __init__(self, name: str, key: str):
+        self.name = name
+        self.key = key
+        # Последний зарезервированный ID живёт здесь же, а не в файле *.seq
+        self.sequence: Optional[int] = None
+        self._records: Dict[Any, dict] = {}
+        self._version = 0
+        self._lock = threading.RLock()
+
+    @property
+    def cache_key(self) -> str:
+        return "memory:" + self.name
+
+    @property
+    def lock_path(self) -> str:
+        # Только для порядка блокировок в locked_all — файла нет
+        return self.cache_key
+
+    def signature(self):
+        return self._version
+
+    def locked(self) -> threading.RLock:
+        return self._lock
+
+    def load(self) -> List[dict]:
+        with self._lock:
+            return list(self._records.values())
+
+    def iter_records(self) -> Iterator[dict]:
+        return iter(self.load())
+
+    def get(self, record_id) -> Optional[dict]:
+        with self._lock:
+            return self._records.get(record_id)
+
+    def _changed(self) -> None:
+        self._version += 1
+
+    def write_all(self, records: List[dict]) -> None:
+        with self._lock:
+            self._records = {}
+            for record in records:
+                # При дублях ID остаётся первая запись — как в RecordIndex
+                self._records.setdefault(record.get(self.key), dict(record))
+            self._changed()
+
+    def upsert(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        self.apply([record], [], current)
+
+    def append(self, record: dict, current: Callable[[], RecordIndex] = None) -> None:
+        self.apply([record], [], current)
+
+    def patch(self, record_id, fields: dict, current: Callable[[], RecordIndex] = None) -> None:
+        with self._lock:
+            # Новый словарь, а не правка старого: прежние индексы и снимки ленты изменений не должны меняться
+            self._records[record_id] = {**self._records[record_id], **fields}
+            self._changed()
+
+    def delete(self, record_id, current: Callable[[], RecordIndex] = None) -> bool:
+        return self.delete_many([record_id], current)[record_id]
+
+    def upsert_many(self, records: List[dict], current: Callable[[], RecordIndex] = None) -> Dict:
+        with self._lock:
+            outcomes = {
+                record[self.key]: UPDATED if record[self.key] in self._records else INSERTED for record in records
+            }
+            self.apply(records, [], current)
+        return outcomes
+
+    def delete_many(self, record_ids, current: Callable[[], RecordIndex] = None) -> Dict:
+        with self._lock:
+            outcomes = {record_id: record_id in self._records for record_id in record_ids}
+            self.apply([], [record_id for record_id, found in outcomes.items() if found], current)
+        return outcomes
+
+    def apply(self, records: List[dict], record_ids, current: Callable[[], RecordIndex] = None) -> None:
+        with self._lock:
+            for record_id in record_ids:
+                self._records.pop(record_id, None)
+            for record in records:
+                self._records[record[self.key]] = dict(record)
+            self._changed()
+
+
+# Хранилища в памяти по имени файла: общие для всех репозиториев процесса
+_memory_stores: Dict[str, InMemoryStorage] = {}
+
+
+def _json_engine(filename, table, key, columns, db_path, group_commit_ms, schema, codec):
+    return JsonFileStorage(filename, key, group_commit_ms=group_commit_ms, codec=codec)
+
+
+def _binary_engine(filename, table, key, columns, db_path, group_commit_ms, schema, codec):
+    binary_name = os.path.splitext(filename)[0] + ".bin"
+    storage = BinarySnapshotStorage(binary_name, key, schema, group_commit_ms=group_commit_ms)
+    if not os.path.exists(binary_name) and os.path.exists(filename):
+        count = json_to_binary(filename, binary_name, key, schema)
+        print(f"Перенесено в снимок {binary_name}: {count} записей")
+    return storage
+
+
+def _jsonl_engine(filename, table, key, columns, db_path, group_commit_ms, schema, codec):
+    journal_name = os.path.splitext(filename)[0] + ".jsonl"
+    storage = JsonlJournalStorage(journal_name, key, group_commit_ms=group_commit_ms, codec=codec)
+    if not os.path.exists(journal_name) and os.path.exists(filename):
+        records = JsonFileStorage(filename, key).load()
+        storage.write_all(records)
+        print(f"Перенесено в журнал {journal_name}: {len(records)} записей")
+    return storage
+
+
+def _sqlite_engine(filename, table, key, columns, db_path, group_commit_ms, schema, codec):
+    storage = SqliteStorage(db_path, table, key, columns, codec=codec)
+    # Одноразовый перенос: таблица только что создана, а JSON-файл уже есть
+    if storage.created and os.path.exists(filename):
+        records = JsonFileStorage(filename, key).load()
+        storage.write_all(records)
+        print(f"Перенесено в SQLite из {filename}: {len(records)} записей")
+    return storage
+
+
+def _memory_engine(filename, table, key, columns, db_path, group_commit_ms, schema, codec):
+    name = os.path.abspath(filename)
+    if name not in _memory_stores:
+        _memory_stores[name] = InMemoryStorage(name, key)
+    return _memory_stores[name]
+
+
+# Движки по имени — значение engine= в репозитории или GYM_STORAGE_ENGINE.
+# Фабрика получает описание хранилища именованными аргументами и возвращает его
+ENGINES: Dict[str, Callable[..., Any]] = {
+    "json": _json_engine,
+    "binary": _binary_engine,
+    "jsonl": _jsonl_engine,
+    "sqlite": _sqlite_engine,
+    "memory": _memory_engine,
+}
+
+
+def register_engine(name: str, factory: Callable[..., Any]) -> None:
+    """Добавляет движок хранения: после этого его можно выбрать как engine=name."""
+    ENGINES[name] = factory
+
+
+def make_storage(filename: str, table: str, key: str, columns: Sequence[str] = (),
+                 engine: str = None, db_path: str = DEFAULT_DB_PATH, group_commit_ms: int = None,
+                 partition_by: str = None, partition_field: str = None, schema: Schema = (),
+                 codec: Union[str, JsonCodec] = None):
+    # codec — имя формата из json_codec.CODECS или JsonCodec; None — GYM_JSON_CODEC
+    storage = _make_engine_storage(
+        filename, table, key, columns, engine, db_path, group_commit_ms, partition_by, partition_field, schema,
+        get_codec(codec),
+    )
+    # Память процесса ни с кем не делится: файл блокировки и версия ей не нужны
+    if isinstance(storage, InMemoryStorage):
+        return storage
+    # Любой другой движок — под блокировками и версиями, чтобы каталог data/ можно было делить между процессами
+    return VersionedStorage(storage)
+
+
+def _make_engine_storage(filename: str, table: str, key: str, columns: Sequence[str], engine: str,
+                         db_path: str, group_commit_ms: int, partition_by: str, partition_field: str,
+                         schema: Schema, codec: JsonCodec):
+    engine = engine or DEFAULT_ENGINE
+    if group_commit_ms is None:
+        group_commit_ms = DEFAULT_GROUP_COMMIT_MS
+    if partition_by and engine not in ("json", "jsonl"):
+        # В SQLite разбиение не нужно: SqliteStorage.between читает диапазон по индексу колонки
+        print(f"Разбиение по разделам ({partition_by}) есть только у движков json и jsonl: "
+              f"{engine} хранит записи без разбиения")
+    if partition_by and engine in ("json", "jsonl"):
+        directory = os.path.splitext(filename)[0]
+        extension = "." + engine
+        # Разделы сжимаются под общей блокировкой каталога — той же, что берут записи
+        lock_path = sidecar(os.path.abspath(directory), ".lock")
+        if engine == "json":
+            make_part = lambda name: JsonFileStorage(
+                name, key, group_commit_ms=group_commit_ms, lock_path=lock_path, codec=codec,
+            )
+        else:
+            make_part = lambda name: JsonlJournalStorage(
+                name, key, group_commit_ms=group_commit_ms, lock_path=lock_path, codec=codec,
+            )
+        migrate = not os.path.isdir(directory) and os.path.exists(filename)
+        storage = PartitionedStorage(directory, key, partition_field, partition_by, make_part, extension)
+        if migrate:
+            records = JsonFileStorage(filename, key).load()
+            storage.write_all(records)
+            print(f"Разложено по разделам в {directory}: {len(records)} записей")
+        return storage
+    factory = ENGINES.get(engine)
+    if factory is None:
+        raise ValueError(f"Неизвестный движок хранения: {engine}")
+    return factory(
+        filename=filename, table=table, key=key, columns=columns, db_path=db_path,
+        group_commit_ms=group_commit_ms, schema=schema, codec=codec,
+    )
@@ -0,0 +1,168 @@
+# repositories/unit_of_work.py
+import json
+import os
+from typing import Any, Dict, List
+
+from repositories.locking import check_conflict, is_clean, locked_all, remember
+from repositories.storage import apply_in_transaction, atomic_write
+
+
+class UnitOfWork:
+    """Единица работы: изменения нескольких репозиториев фиксируются вместе.
+
+    Сохранения и удаления копятся в памяти, а commit пишет каждое хранилище
+    один раз. Если все хранилища — таблицы одной базы SQLite, это одна
+    транзакция. Для файлов сначала атомарно пишется журнал намерений; если
+    программа упадёт посреди записи, recover допишет изменения до конца.
+
+        with UnitOfWork(member_repo, payment_repo) as uow:
+            uow.save(payment_repo, payment)
+            uow.save(member_repo, member)
+    """
+
+    JOURNAL_NAME = "unit_of_work.journal"
+
+    def __init__(self, *repos, journal_path: str = None):
+        self.repos = list(repos)
+        if journal_path is None:
+            directory = os.path.dirname(getattr(repos[0], "filename", "")) if repos else ""
+            journal_path = os.path.join(directory or "data", self.JOURNAL_NAME)
+        self.journal_path = journal_path
+        self._staged: Dict[int, Dict[str, Any]] = {}
+
+    def _batch(self, repo) -> Dict[str, Any]:
+        if repo not in self.repos:
+            self.repos.append(repo)
+        return self._staged.setdefault(id(repo), {"repo": repo, "records": {}, "objects": {}, "deleted": {}})
+
+    def save(self, repo, obj) -> None:
+        if is_clean(obj):
+            return
+        # Запись строим сразу: ошибка в объекте всплывёт до того, как что-то попадёт на диск
+        record = repo._snapshot(obj)
+        batch = self._batch(repo)
+        record_id = record[repo.storage.key]
+        batch["deleted"].pop(record_id, None)
+        batch["records"][record_id] = record
+        batch["objects"][record_id] = obj
+
+    def delete(self, repo, record_id) -> None:
+        batch = self._batch(repo)
+        batch["records"].pop(record_id, None)
+        batch["objects"].pop(record_id, None)
+        batch["deleted"][record_id] = True
+
+    def rollback(self) -> None:
+        self._staged.clear()
+
+    def commit(self) -> None:
+        batches = [b for b in self._staged.values() if b["records"] or b["deleted"]]
+        self._staged.clear()
+        if not batches:
+            return
+        committed = False
+        try:
+            # Все хранилища блокируются на время проверки и записи: чужое изменение
+            # между ними невозможно, а уже устаревшие объекты дают конфликт до записи
+            with locked_all([b["repo"].storage for b in batches]):
+                for b in batches:
+                    b["before"] = b["repo"]._signature()
+                    for obj in b["objects"].values():
+                        check_conflict(obj, b["repo"].KEY, b["repo"]._stored)
+                sqlite_batches = [
+                    (b["repo"].storage, list(b["records"].values()), list(b["deleted"])) for b in batches
+                ]
+                if len(batches) == 1 or not apply_in_transaction(sqlite_batches):
+                    self._commit_with_journal(batches)
+                for b in batches:
+                    b["after"] = b["repo"]._signature()
+                    b["stamp"] = b["repo"]._object_stamp()
+            for b in batches:
+                for record_id, obj in b["objects"].items():
+                    remember(obj, b["records"][record_id])
+            committed = True
+        finally:
+            for b in batches:
+                self._refresh_cache(b, committed)
+
+    @staticmethod
+    def _refresh_cache(batch: Dict[str, Any], committed: bool) -> None:
+        # После записи под блокировкой актуальный индекс правится на месте (см. BaseRepository._writing)
+        repo = batch["repo"]
+        records, record_ids = list(batch["records"].values()), list(batch["deleted"])
+        changed = list(batch["records"]) + record_ids
+        if not committed:
+            repo.cache.invalidate(repo.storage.cache_key, changed)
+            return
+        repo.cache.update(
+            repo.storage.cache_key, batch["before"], batch["after"], changed,
+            lambda index: index.apply(records, record_ids, batch["stamp"]),
+        )
+
+    def _commit_with_journal(self, batches: List[Dict[str, Any]]) -> None:
+        # Изменение одного хранилища и так атомарно — журнал нужен только для нескольких
+        journal = len(batches) > 1
+        if journal:
+            entries = [
+                {
+                    "storage": b["repo"].storage.cache_key,
+                    "records": list(b["records"].values()),
+                    "deleted": list(b["deleted"]),
+                }
+                for b in batches
+            ]
+            os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+            atomic_write(self.journal_path, lambda f: json.dump(entries, f, ensure_ascii=False))
+        for b in batches:
+            self._apply(b["repo"], list(b["records"].values()), list(b["deleted"]))
+        if journal:
+            os.remove(self.journal_path)
+
+    @staticmethod
+    def _apply(repo, records: List[dict], record_ids: List) -> None:
+        repo.storage.apply(records, record_ids, repo._index)
+        # fsync группового коммита не ждёт окна: журнал удаляется только после того, как записи на диске
+        if hasattr(repo.storage, "flush"):
+            repo.storage.flush()
+
+    def recover(self) -> bool:
+        """Доигрывает транзакцию, прерванную сбоем. Возвращает True, если было что доигрывать."""
+        if not os.path.exists(self.journal_path):
+            return False
+        # Под теми же блокировками, что и commit: журнал живой транзакции другого процесса не трогаем
+        with locked_all([repo.storage for repo in self.repos]):
+            try:
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                return False
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Ошибка чтения журнала транзакций: {e}")
+                return False
+            repos = {repo.storage.cache_key: repo for repo in self.repos}
+            remaining = []
+            for entry in entries:
+                repo = repos.get(entry["storage"])
+                if repo is None:
+                    remaining.append(entry)
+                    continue
+                # Повторное применение безопасно: сохранение по ключу перезаписывает ту же запись
+                self._apply(repo, entry["records"], entry["deleted"])
+                changed = [record[repo.storage.key] for record in entry["records"]] + list(entry["deleted"])
+                repo.cache.invalidate(repo.storage.cache_key, changed)
+            if remaining:
+                atomic_write(self.journal_path, lambda f: json.dump(remaining, f, ensure_ascii=False))
+            else:
+                os.remove(self.journal_path)
+        print("Незавершённая транзакция восстановлена.")
+        return True
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
@@ -0,0 +1,85 @@
+# repositories/views.py
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class RecordView:
+    """Лёгкое представление записи для чтения.
+
+    Поля из FIELDS берутся прямо из словаря записи, без конструктора и
+    валидации доменного объекта. Всё остальное (методы, вычисляемые поля)
+    и любые изменения требуют полного объекта — его даёт materialize().
+    """
+
+    # атрибут -> (ключ записи, преобразование значения или None)
+    FIELDS: Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]] = {}
+
+    __slots__ = ("_record", "_materialize")
+
+    def __init__(self, record: dict, materialize: Callable[[], Any]):
+        object.__setattr__(self, "_record", record)
+        object.__setattr__(self, "_materialize", materialize)
+
+    def __getattr__(self, name: str) -> Any:
+        field = self.FIELDS.get(name)
+        if field is None:
+            return getattr(self.materialize(), name)
+        key, convert = field
+        value = self._record.get(key)
+        return convert(value) if convert is not None and value is not None else value
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{type(self).__name__} только для чтения: измените объект из materialize()")
+
+    def materialize(self) -> Any:
+        # Полный объект из кэша репозитория — тот же, что вернёт find_by_id
+        return self._materialize()
+
+
+class MemberView(RecordView):
+    FIELDS = {
+        "id": ("id", None),
+        "first_name": ("first_name", None),
+        "last_name": ("last_name", None),
+        "email": ("email", None),
+        "phone": ("phone", None),
+        "membership_start_date": ("membership_start", date.fromisoformat),
+        "membership_end_date": ("membership_end", date.fromisoformat),
+        "is_active": ("is_active", None),
+    }
+
+    __slots__ = ()
+
+    def get_full_name(self) -> str:
+        return f"{self.first_name} {self.last_name}"
+
+
+class CoachView(RecordView):
+    FIELDS = {
+        "id": ("id", None),
+        "first_name": ("first_name", None),
+        "last_name": ("last_name", None),
+        "email": ("email", None),
+        "phone": ("phone", None),
+        "specialization": ("specialization", None),
+        "hourly_rate": ("hourly_rate", Decimal),
+        "is_active": ("is_active", None),
+    }
+
+    __slots__ = ()
+
+    def get_full_name(self) -> str:
+        return f"{self.first_name} {self.last_name} ({self.specialization})"
+
+
+class PaymentView(RecordView):
+    FIELDS = {
+        "payment_id": ("payment_id", None),
+        "member_id": ("member_id", None),
+        "plan_id": ("plan_id", None),
+        "amount": ("amount", None),
+        "payment_date": ("payment_date", date.fromisoformat),
+    }
+
+    __slots__ = ()
@@ -0,0 +1,24 @@
+from datetime import date
+
+from classes.people import Member
+from repositories.member_repository import MemberRepository
+from repositories.storage import wait_for_compactions
+
+
+def test_journal_compacts_in_long_running_process(tmp_path):
+    # Журнал читается один раз, дальше — только свои записи с правкой индекса на месте;
+    # сжатие всё равно должно запускаться по счётчикам дозаписей
+    repo = MemberRepository(str(tmp_path / "members.json"), engine="jsonl")
+    for member_id in range(1, 51):
+        repo.save(Member(member_id, "Иван", "Петров", f"m{member_id}@x.ru", "89990000000", date(2024, 1, 1), None))
+    for round_number in range(60):
+        for member in repo.find_all():
+            member.phone = "8999000%04d" % round_number
+            repo.save(member)
+    wait_for_compactions()
+
+    lines = sum(1 for _ in open(tmp_path / "members.jsonl", encoding="utf-8"))
+    # Без сжатия в журнале было бы 50 + 50 * 60 строк
+    assert lines < 1500
+    assert len(repo.find_all()) == 50
+    assert {member.phone for member in repo.find_all()} == {"89990000059"}
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from repositories.member_repository import MemberRepository
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENGINES = ["json", "jsonl", "binary", "sqlite"]
+
+# Процесс сохраняет участников с ID от base до base + count - 1; движок и окно группового
+# коммита задаются переменными окружения, как при обычном запуске
+SAVE_MEMBERS = textwrap.dedent("""
+    import os, sys
+    from datetime import date
+    from repositories.member_repository import MemberRepository
+    from classes.people import Member
+    base, count = int(sys.argv[1]), int(sys.argv[2])
+    repo = MemberRepository()
+    for member_id in range(base, base + count):
+        repo.save(Member(member_id, "Иван", "Петров", f"m{member_id}@x.ru", "89990000000",
+                         date(2024, 1, 1), None))
+    if len(sys.argv) > 3:
+        os._exit(0)
+""")
+
+
+def _env(engine):
+    return dict(os.environ, PYTHONPATH=ROOT, GYM_STORAGE_ENGINE=engine, GYM_GROUP_COMMIT_MS="5")
+
+
+def _member_ids(engine):
+    return {member.id for member in MemberRepository(engine=engine).find_all()}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_concurrent_processes_keep_every_save(engine, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    batches = [(1, 40), (1000, 30), (2000, 30)]
+    processes = [
+        subprocess.Popen([sys.executable, "-c", SAVE_MEMBERS, str(base), str(count)], env=_env(engine))
+        for base, count in batches
+    ]
+    assert [process.wait(timeout=120) for process in processes] == [0, 0, 0]
+
+    expected = {member_id for base, count in batches for member_id in range(base, base + count)}
+    assert _member_ids(engine) == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_save_survives_exit_right_after_it(engine, tmp_path, monkeypatch):
+    # os._exit не запускает atexit и finally: сохранённое должно быть в файле уже при возврате из save
+    monkeypatch.chdir(tmp_path)
+    process = subprocess.run([sys.executable, "-c", SAVE_MEMBERS, "1", "3", "exit"], env=_env(engine))
+    assert process.returncode == 0
+    assert _member_ids(engine) == {1, 2, 3}
@@ -0,0 +1,97 @@
+import random
+from datetime import date
+
+import pytest
+
+from classes.people import Member
+from repositories.cache import ObjectCache, RecordIndex
+from repositories.member_repository import MemberRepository
+from repositories.storage import wait_for_compactions
+
+
+class Item:
+    def __init__(self, record):
+        self.record = dict(record)
+
+    def __eq__(self, other):
+        return self.record == other.record
+
+    __hash__ = object.__hash__
+
+
+class View:
+    def __init__(self, record, load):
+        self.record = record
+
+
+def _random_record(record_id):
+    return {
+        "id": record_id,
+        "group": random.choice([1, 2, 3, None]),
+        "day": random.choice([None] + ["2024-%02d" % month for month in range(1, 8)]),
+    }
+
+
+def _queries(index):
+    # Все выборки, которым нужны вторичные индексы: группы, сортировки, представления
+    return (
+        [index.find_by("group", group) for group in (1, 2, 3, None)],
+        sorted(index.values("group"), key=str),
+        index.between("day", "2024-02", "2024-05"),
+        [index.between("day", None, None, "group", group) for group in (1, 2)],
+        index.page("day", 0, 100),
+        index.page("day", 3, 7, True),
+        index.after("day", None, 5),
+        index.after("day", (False, "2024-03", 10), 50, True),
+        [view.record for view in index.views(View)],
+        index.page("id", 0, 100),
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_index_updated_in_place_matches_rebuild(seed):
+    random.seed(seed)
+    objects = ObjectCache() if seed % 2 else None
+    index = RecordIndex([_random_record(record_id) for record_id in range(1, 30)], "id", Item, objects, "items")
+    _queries(index)
+    for step in range(300):
+        records = [_random_record(random.randint(1, 45)) for _ in range(random.randint(0, 3))]
+        record_ids = [random.randint(1, 45) for _ in range(random.randint(0, 3))]
+        assert index.apply(records, record_ids)
+        if step % 3 == 0:
+            rebuilt = RecordIndex(list(index.records), "id", Item)
+            assert _queries(index) == _queries(rebuilt), step
+
+
+@pytest.mark.parametrize("engine", ["json", "jsonl", "binary", "sqlite"])
+def test_repository_index_after_writes_matches_storage(engine, tmp_path):
+    random.seed(engine)
+    repo = MemberRepository(str(tmp_path / "members.json"), engine=engine, db_path=str(tmp_path / "gym.db"))
+
+    def member(member_id):
+        return Member(member_id, random.choice(["Иван", "Олег"]), "Петров", f"m{member_id}@x.ru",
+                      "89990000000", date(2024, 1, 1), date(2025, 1, 1))
+
+    repo.find_all()
+    for _ in range(200):
+        operation, member_id = random.random(), random.randint(1, 40)
+        if operation < 0.4:
+            repo.save(member(member_id))
+        elif operation < 0.6:
+            found = repo.find_by_id(member_id)
+            if found:
+                found.first_name = "Анна"
+                repo.save(found)
+        elif operation < 0.8:
+            repo.delete(member_id)
+        elif operation < 0.9:
+            repo.save_many([member(random.randint(1, 40)) for _ in range(4)])
+        else:
+            repo.delete_many([random.randint(1, 40) for _ in range(4)])
+    wait_for_compactions()
+
+    index = repo._index()
+    rebuilt = RecordIndex(repo.storage.load(), repo.KEY, repo._to_object)
+    assert sorted(index.records, key=lambda record: record["id"]) == sorted(rebuilt.records, key=lambda record: record["id"])
+    page = [repo._to_record(found) for found in repo.find_page(0, 100, "first_name")]
+    assert page == [repo._to_record(found) for found in rebuilt.page("first_name", 0, 100)]
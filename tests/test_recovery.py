@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+
+from classes.PaymentService import PaymentService
+from classes.people import Member
+from repositories.member_repository import MemberRepository
+from repositories.payment_repository import PaymentRepository
+from repositories.unit_of_work import UnitOfWork
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEMBER = MemberRepository._to_record(
+    Member(42, "Петр", "Восстановленный", "p@x.ru", "+79990000000", date(2024, 1, 1), date(2030, 1, 1))
+)
+PAYMENT = {"payment_id": 7, "member_id": 42, "plan_id": 1, "amount": 300, "payment_date": "2024-01-01"}
+
+
+def _leave_interrupted_purchase(member_repo, payment_repo):
+    # Журнал намерений, который оставила бы покупка, прерванная до записи хранилищ
+    entries = [
+        {"storage": member_repo.storage.cache_key, "records": [MEMBER], "deleted": []},
+        {"storage": payment_repo.storage.cache_key, "records": [PAYMENT], "deleted": []},
+    ]
+    with open(os.path.join("data", UnitOfWork.JOURNAL_NAME), "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+
+def test_payment_service_recover(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    member_repo, payment_repo = MemberRepository(), PaymentRepository()
+    _leave_interrupted_purchase(member_repo, payment_repo)
+
+    assert PaymentService(member_repo, payment_repo).recover()
+    assert member_repo.find_by_id(42).last_name == "Восстановленный"
+    assert payment_repo.find_by_id(7).member_id == 42
+    assert not os.path.exists(os.path.join("data", UnitOfWork.JOURNAL_NAME))
+    assert not PaymentService(member_repo, payment_repo).recover()
+
+
+def test_main_recovers_before_first_read(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    _leave_interrupted_purchase(MemberRepository(), PaymentRepository())
+    env = {name: value for name, value in os.environ.items() if not name.startswith("GYM_")}
+    env["PYTHONPATH"] = ROOT
+
+    process = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py")], env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert process.returncode == 0, process.stderr
+    output = process.stdout
+    recovered = output.index("Незавершённая транзакция восстановлена.")
+    listing = output.index("Существующие участники:")
+    assert recovered < listing
+    assert "Петр Восстановленный" in output[listing:]
@@ -0,0 +1,38 @@
+from repositories.cache import RecordIndex
+from repositories.storage import JsonFileStorage, JsonlJournalStorage
+
+
+def _ids(storage):
+    return sorted(record["id"] for record in storage.load())
+
+
+def test_journal_append_cuts_torn_tail(tmp_path):
+    path = tmp_path / "payments.jsonl"
+    storage = JsonlJournalStorage(str(path), "id")
+    storage.upsert({"id": 1, "amount": 10})
+    storage.upsert({"id": 2, "amount": 20})
+    # Прошлый процесс упал посреди строки
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"id": 3, "amo')
+    assert _ids(storage) == [1, 2]
+
+    storage.upsert({"id": 4, "amount": 40})
+    assert _ids(storage) == [1, 2, 4]
+    assert path.read_text(encoding="utf-8").count("\n") == 3
+    assert path.read_text(encoding="utf-8").endswith("\n")
+
+
+def test_tombstone_append_cuts_torn_tail(tmp_path):
+    storage = JsonFileStorage(str(tmp_path / "members.json"), "id")
+    storage.write_all([{"id": record_id} for record_id in range(1, 20)])
+    current = lambda: RecordIndex(storage.load(), "id", lambda record: record)
+    storage.delete(3, current)
+    # Оборванная отметка "1" не должна склеиться со следующей в "15"
+    with open(storage.tombstones_path, "a", encoding="utf-8") as f:
+        f.write("1")
+    assert 1 in _ids(storage)
+
+    storage.delete(5, current)
+    ids = _ids(storage)
+    assert 1 in ids and 15 in ids
+    assert 3 not in ids and 5 not in ids